@@ -0,0 +1,87 @@
+# Служебный символ конца потока: в адаптивном режиме длина данных не
+# записывается, декодер останавливается на нём
+EOF = 256
+NUM_SYMBOLS = EOF + 1
+# Прибавка к частоте встреченного символа и предел суммы частот: сумма
+# не должна превышать 2^16, чтобы range coder не терял точность
+INCREMENT = 32
+MAX_TOTAL = 1 << 16
+
+
+class FenwickModel:
+    """Адаптивная модель частот на дереве Фенвика (двоичном индексированном
+    дереве).
+
+    tree[i] хранит сумму частот символов (i - (i & -i), i], поэтому
+    накопленная частота, поиск символа по точке интервала и обновление
+    занимают O(log k). Все символы начинают с частоты 1, и после каждого
+    символа его частота растёт на INCREMENT; когда сумма превышает
+    MAX_TOTAL, частоты делятся пополам - модель быстрее подстраивается под
+    смену статистики и не переполняет кодер. Кодер и декодер проводят
+    одни и те же обновления, так что таблицу частот передавать не нужно.
+    """
+
+    def __init__(self, num_symbols=NUM_SYMBOLS, increment=INCREMENT, limit=MAX_TOTAL):
+        self.size = num_symbols
+        self.increment = increment
+        self.limit = limit
+        self.counts = [1] * num_symbols
+        self.tree = [0] * (num_symbols + 1)
+        # Старшая степень двойки не больше size - первый шаг спуска в find
+        self.top = 1 << (num_symbols.bit_length() - 1)
+        self._rebuild()
+
+    def _rebuild(self):
+        """Строит дерево по counts за O(k)"""
+        tree = self.tree
+        size = self.size
+        tree[1:] = self.counts
+        tree[0] = 0
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self.total = sum(self.counts)
+
+    def low(self, symbol):
+        """Накопленная частота: сумма частот символов меньше symbol"""
+        tree = self.tree
+        result = 0
+        while symbol:
+            result += tree[symbol]
+            symbol &= symbol - 1
+        return result
+
+    def find(self, target):
+        """Символ, чей интервал содержит target, и нижняя граница интервала"""
+        tree = self.tree
+        size = self.size
+        pos = 0
+        low = 0
+        step = self.top
+        while step:
+            node = pos + step
+            if node <= size and low + tree[node] <= target:
+                pos = node
+                low += tree[node]
+            step >>= 1
+        return pos, low
+
+    def update(self, symbol):
+        """Учитывает очередное появление symbol"""
+        increment = self.increment
+        self.counts[symbol] += increment
+        self.total += increment
+        tree = self.tree
+        size = self.size
+        i = symbol + 1
+        while i <= size:
+            tree[i] += increment
+            i += i & -i
+        if self.total > self.limit:
+            self.rescale()
+
+    def rescale(self):
+        """Делит частоты пополам (не ниже 1) и перестраивает дерево"""
+        self.counts = [(count + 1) >> 1 for count in self.counts]
+        self._rebuild()
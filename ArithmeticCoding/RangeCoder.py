@@ -0,0 +1,86 @@
+# Range coder: интервал 32 бита, нормализация целым байтом, когда в нём
+# остаётся меньше 24 бит
+RANGE_BITS = 32
+RANGE_MASK = (1 << RANGE_BITS) - 1
+RANGE_TOP = 1 << 24
+
+
+class RangeEncoder:
+    """Байтовый range coder: интервал сужается так же, как в
+    arithmetic_encode, но нормализация выводит сразу целый байт.
+
+    low хранится в 64-битном регистре: бит 32 - перенос в уже выведенные
+    байты. Последний выведенный байт и идущие за ним 0xFF задерживаются
+    (cache и cache_size), пока не станет известно, будет ли перенос, -
+    поэтому сужение интервала вокруг границы байта не приводит к потере
+    точности, как у побитовой схемы без обработки underflow.
+
+    Готовые байты копятся в out, take забирает их по мере кодирования.
+    """
+
+    def __init__(self):
+        self.out = bytearray()
+        self.low = 0
+        self.range = RANGE_MASK
+        self.cache = 0
+        self.cache_size = 1
+
+    def encode(self, start, size, total):
+        """Сужает интервал до [start, start + size) из total"""
+        r = self.range // total
+        self.low += r * start
+        self.range = r * size
+        while self.range < RANGE_TOP:
+            self.range <<= 8
+            self._shift_low()
+
+    def _shift_low(self):
+        low = self.low
+        if low < 0xFF000000 or low > RANGE_MASK:
+            carry = low >> RANGE_BITS
+            self.out.append((self.cache + carry) & 0xFF)
+            self.out.extend(bytes([(0xFF + carry) & 0xFF]) * (self.cache_size - 1))
+            self.cache_size = 0
+            self.cache = (low >> 24) & 0xFF
+        self.cache_size += 1
+        self.low = (low << 8) & RANGE_MASK
+
+    def finish(self):
+        """Выводит оставшиеся байты low (включая отложенные)"""
+        for _ in range(5):
+            self._shift_low()
+
+    def take(self):
+        data = bytes(self.out)
+        self.out.clear()
+        return data
+
+
+class RangeDecoder:
+    """Декодер потока RangeEncoder; source - итератор по байтам сжатых
+    данных (за концом потока читаются нули).
+
+    Символ декодируется в два шага: threshold(total) даёт точку внутри
+    интервала, по ней модель находит символ, затем decode(start, size)
+    сужает интервал так же, как это сделал кодер.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.range = RANGE_MASK
+        self.r = 0
+        # code - смещение кодового числа от low; первый байт потока всегда 0
+        self.code = 0
+        for _ in range(5):
+            self.code = ((self.code << 8) | next(source, 0)) & RANGE_MASK
+
+    def threshold(self, total):
+        self.r = self.range // total
+        return min(self.code // self.r, total - 1)
+
+    def decode(self, start, size):
+        self.code -= self.r * start
+        self.range = self.r * size
+        while self.range < RANGE_TOP:
+            self.code = ((self.code << 8) | next(self.source, 0)) & RANGE_MASK
+            self.range <<= 8
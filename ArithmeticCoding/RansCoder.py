@@ -0,0 +1,92 @@
+# Нижняя граница состояния rANS: состояние всегда в [RANS_L, RANS_L * 256),
+# то есть помещается в 32 бита, и нормализация идёт целыми байтами
+RANS_L = 1 << 23
+# Число чередующихся состояний: символ i кодируется состоянием i % streams
+STREAMS = 2
+
+
+def rans_encode(data, cumulative, scale_bits, streams=STREAMS):
+    """Кодирование rANS по таблице накопленных частот с суммой 2^scale_bits.
+
+    rANS работает как стек: символы кодируются с конца, а байты
+    нормализации выводятся в обратном порядке, так что декодер читает
+    поток от начала. Результат: [число состояний][состояния по 4 байта]
+    [байты нормализации].
+    """
+    freq = [cumulative[byte + 1] - cumulative[byte] for byte in range(256)]
+    # Перед кодированием символа состояние уменьшается ниже x_max[byte],
+    # чтобы после него оно осталось в [RANS_L, RANS_L * 256)
+    x_max = [((RANS_L >> scale_bits) << 8) * f for f in freq]
+    states = [RANS_L] * streams
+    out = bytearray()
+    for i in range(len(data) - 1, -1, -1):
+        byte = data[i]
+        j = i % streams
+        x = states[j]
+        limit = x_max[byte]
+        while x >= limit:
+            out.append(x & 0xFF)
+            x >>= 8
+        f = freq[byte]
+        states[j] = ((x // f) << scale_bits) + x % f + cumulative[byte]
+    out.reverse()
+
+    head = bytearray([streams])
+    for x in states:
+        head += x.to_bytes(4, "big")
+    return head + out
+
+
+def build_decode_table(cumulative, scale_bits):
+    """Таблицы по слоту (младшие scale_bits бит состояния): символ, его
+    частота и смещение слота внутри интервала символа"""
+    size = 1 << scale_bits
+    symbols = bytearray(size)
+    freqs = [0] * size
+    offsets = [0] * size
+    for byte in range(256):
+        start = cumulative[byte]
+        f = cumulative[byte + 1] - start
+        if f:
+            symbols[start : start + f] = bytes([byte]) * f
+            freqs[start : start + f] = [f] * f
+            offsets[start : start + f] = range(f)
+    return symbols, freqs, offsets
+
+
+def rans_decode(source, out, total, cumulative, scale_bits, chunk=1 << 16):
+    """Декодирует поток rans_encode: source - итератор по байтам сжатых
+    данных, результат пишется в out кусками по chunk байт.
+
+    Символ находится по таблице без деления: слот - младшие биты
+    состояния, новое состояние - freq * (x >> scale_bits) + смещение.
+    """
+    streams = next(source)
+    states = []
+    for _ in range(streams):
+        x = 0
+        for _ in range(4):
+            x = (x << 8) | next(source, 0)
+        states.append(x)
+    if not total:
+        return
+    symbols, freqs, offsets = build_decode_table(cumulative, scale_bits)
+    mask = (1 << scale_bits) - 1
+
+    buffer = bytearray()
+    j = 0
+    for _ in range(total):
+        x = states[j]
+        slot = x & mask
+        buffer.append(symbols[slot])
+        x = freqs[slot] * (x >> scale_bits) + offsets[slot]
+        while x < RANS_L:
+            x = (x << 8) | next(source, 0)
+        states[j] = x
+        j += 1
+        if j == streams:
+            j = 0
+        if len(buffer) >= chunk:
+            out.write(buffer)
+            buffer.clear()
+    out.write(buffer)
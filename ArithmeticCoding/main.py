@@ -1,57 +1,93 @@
 #!/bin/python3
 
+import argparse
+import io
 import os
 import sys
-from collections import defaultdict
+from bisect import bisect_right
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.Histogram import countFrequencies
+from FenwickModel import EOF, FenwickModel
+from RangeCoder import RangeDecoder, RangeEncoder
+from RansCoder import rans_decode, rans_encode
 
 # Количество бит для целочисленного представления (для работы с целыми числами вместо дробных)
 PRECISION = 32
+# Частоты нормализуются к сумме 2^PROB_BITS: интервал 2^PRECISION делится
+# на неё без потери точности, а символ при декодировании находится
+# прямо по таблице слотов из 2^PROB_BITS элементов
+PROB_BITS = 16
+# Размер куска при чтении сжатых данных и записи результата
+IO_CHUNK = 1 << 16
+# Вход сжимается кадрами: у каждого кадра своя модель, а в памяти
+# одновременно находится только один кадр
+FRAME_SIZE = 1 << 22
+# Первый байт сжатого файла - номер формата в этом списке, по нему
+# распаковка выбирает декодер
+FORMATS = ["bitwise", "range", "rans", "adaptive"]
 
 
 def calculate_frequencies(data):
     """Вычисление частот символов в данных (вероятностная модель)"""
-    freq = defaultdict(int)
-    for byte in data:
-        freq[byte] += 1
-    return freq
+    return countFrequencies(data)
 
 
 def normalize_frequencies(freq, total):
-    """Нормализует частоты для работы с целыми числами (масштабирует к заданной точности)"""
-    scale = (1 << PRECISION) // total  # Вычисляем масштабный коэффициент
+    """Нормализует частоты для работы с целыми числами (масштабирует к сумме 2^PROB_BITS)"""
+    if total == 0:
+        return {}
+    target = 1 << PROB_BITS
     normalized = {}
     for byte, count in freq.items():
         # Гарантируем, что каждый символ имеет ненулевую частоту
-        normalized[byte] = max(1, count * scale)
+        normalized[byte] = max(1, count * target // total)
+    # Остаток от округления отдаём самому частому символу - сумма ровно 2^PROB_BITS
+    top = max(normalized, key=normalized.get)
+    normalized[top] += target - sum(normalized.values())
     return normalized
 
 
 def build_probability_table(normalized_freq):
-    """Строит таблицу вероятностей с целыми числами (разбивает интервал на подынтервалы)"""
-    prob_table = []
-    cumulative = 0
-    # Сортируем символы и создаем таблицу с накопленными вероятностями
-    for byte, weight in sorted(normalized_freq.items()):
-        # (символ, нижняя граница, верхняя граница)
-        prob_table.append((byte, cumulative, cumulative + weight))
-        cumulative += weight
+    """Строит таблицу накопленных частот (разбивает интервал на подынтервалы)
+
+    cumulative[b] - нижняя граница символа b, cumulative[b + 1] - верхняя;
+    у отсутствующих символов интервал пустой. Индексация по самому байту
+    заменяет поиск символа в таблице.
+    """
+    cumulative = [0] * 257
+    for byte in range(256):
+        cumulative[byte + 1] = cumulative[byte] + normalized_freq.get(byte, 0)
     # Возвращаем таблицу и общий вес (аналог суммы вероятностей)
-    return prob_table, cumulative
+    return cumulative, cumulative[256]
+
 
+def build_slot_table(cumulative, total_weight):
+    """Таблица слотов: slots[v] - символ, чей интервал содержит v.
 
-def arithmetic_encode(data, prob_table, total_weight):
+    Строится, только если общий вес - степень двойки не больше 2^PROB_BITS,
+    иначе возвращается None и символ ищется двоичным поиском.
+    """
+    if total_weight & (total_weight - 1) or total_weight > 1 << PROB_BITS:
+        return None
+    slots = bytearray(total_weight)
+    for byte in range(256):
+        slots[cumulative[byte] : cumulative[byte + 1]] = bytes([byte]) * (
+            cumulative[byte + 1] - cumulative[byte]
+        )
+    return slots
+
+
+def arithmetic_encode(data, cumulative, total_weight):
     """Целочисленное кодирование (реализация алгоритма арифметического кодирования)"""
     low = 0  # Нижняя граница интервала
     # Верхняя граница интервала (максимальное 32-битное число)
     high = (1 << PRECISION) - 1
 
     for byte in data:
-        # Находим диапазон для текущего символа в таблице вероятностей
-        b_high = 0
-        b_low = 0
-        for b, b_low, b_high in prob_table:
-            if b == byte:
-                break
+        # Диапазон текущего символа - прямо по индексу в таблице
+        b_low = cumulative[byte]
+        b_high = cumulative[byte + 1]
 
         # Обновляем границы интервала (сужаем его)
         range_size = high - low + 1
@@ -88,131 +124,307 @@ def bits_to_bytes(bits):
         yield byte << (8 - count)
 
 
-def compress(input_file, output_file):
-    """Сжатие с целочисленной арифметикой"""
-    with open(input_file, "rb") as f:
-        data = f.read()
+def range_encode(data, cumulative, total_weight):
+    """Кодирование range coder по статической таблице накопленных частот"""
+    encoder = RangeEncoder()
+    encode = encoder.encode
+    for byte in data:
+        b_low = cumulative[byte]
+        encode(b_low, cumulative[byte + 1] - b_low, total_weight)
+    encoder.finish()
+    return encoder.out
+
+
+def write_model(f, normalized_freq):
+    """Модель кадра: [число символов - 1][символ, частота - 1 (2 байта)]...
+
+    Записываются уже нормализованные частоты (от 1 до 2^PROB_BITS), так что
+    размер модели не зависит от длины кадра, а декодеру не нужно повторять
+    нормализацию.
+    """
+    f.write(bytes([len(normalized_freq) - 1]))
+    for byte, count in sorted(normalized_freq.items()):
+        f.write(bytes([byte]))
+        f.write((count - 1).to_bytes(2, "big"))
+
 
+def read_model(f):
+    """Читает модель кадра: {символ: нормализованная частота}"""
+    num_symbols = f.read(1)[0] + 1
+    normalized_freq = {}
+    for _ in range(num_symbols):
+        byte = f.read(1)[0]
+        normalized_freq[byte] = int.from_bytes(f.read(2), "big") + 1
+    return normalized_freq
+
+
+def encode_frame(data, fmt):
+    """Сжимает один кадр: (нормализованная модель, сжатые данные)"""
     # 1. Строим вероятностную модель (частоты символов)
     freq = calculate_frequencies(data)
-    total = len(data)
 
     # 2. Нормализуем частоты для работы с целыми числами
-    normalized_freq = normalize_frequencies(freq, total)
-
-    # 3. Строим таблицу вероятностей (разбиваем интервал на подынтервалы)
-    prob_table, total_weight = build_probability_table(normalized_freq)
-
-    # Записываем заголовок сжатого файла
-    with open(output_file, "wb") as f:
-        # Длина исходных данных (4 байта)
-        f.write(total.to_bytes(4, "big"))
-        # Количество уникальных символов (1 байт)
-        f.write(len(freq).to_bytes(1, "big"))
-        # Таблица частот (символ + частота, 3 байта на символ)
-        for byte, count in sorted(freq.items()):
-            f.write(bytes([byte]))
-            f.write(count.to_bytes(2, "big"))
-
-        # 4. Кодируем данные с помощью арифметического кодирования
-        bits = arithmetic_encode(data, prob_table, total_weight)
-        bytes_data = bits_to_bytes(bits)
-
-        # Записываем сжатые данные
-        buffer = bytearray()
-        for byte in bytes_data:
-            buffer.append(byte)
-            if len(buffer) >= 4096:  # Буферизация для эффективной записи
-                f.write(buffer)
-                buffer.clear()
-        if buffer:
-            f.write(buffer)
+    normalized_freq = normalize_frequencies(freq, len(data))
+
+    # 3. Строим таблицу накопленных частот (разбиваем интервал на подынтервалы)
+    cumulative, total_weight = build_probability_table(normalized_freq)
+
+    # 4. Кодируем данные выбранным кодером
+    if fmt == "range":
+        payload = range_encode(data, cumulative, total_weight)
+    elif fmt == "rans":
+        payload = rans_encode(data, cumulative, PROB_BITS)
+    else:
+        payload = bytes(bits_to_bytes(arithmetic_encode(data, cumulative, total_weight)))
+    return normalized_freq, payload
+
+
+def compress(input_file, output_file, fmt="bitwise", frame_size=FRAME_SIZE):
+    """Сжатие со статической моделью (fmt: bitwise, range или rans).
+
+    Файл: [номер формата, 1 байт], затем кадры по frame_size байт входа.
+    Кадр: [длина исходных данных, 8 байт][модель][длина сжатых данных,
+    8 байт][сжатые данные].
+    """
+    if frame_size < 1:
+        raise ValueError("размер кадра должен быть положительным")
+    with open(input_file, "rb") as f, open(output_file, "wb") as out:
+        out.write(bytes([FORMATS.index(fmt)]))
+        while True:
+            data = f.read(frame_size)
+            if not data:
+                break
+            normalized_freq, payload = encode_frame(data, fmt)
+            out.write(len(data).to_bytes(8, "big"))
+            write_model(out, normalized_freq)
+            out.write(len(payload).to_bytes(8, "big"))
+            out.write(payload)
 
     # Вычисляем степень сжатия
     orig_size = os.path.getsize(input_file)
     comp_size = os.path.getsize(output_file)
-    print(f"Степень сжатия: {orig_size/comp_size:.2f}")
+    if comp_size:
+        print(f"Степень сжатия: {orig_size/comp_size:.2f}")
 
 
-def arithmetic_decode(input_file, output_file):
-    """Декодирование с целочисленной арифметикой"""
-    with open(input_file, "rb") as f:
-        # Читаем заголовок
-        total = int.from_bytes(f.read(4), "big")  # Длина исходных данных
-        # Количество уникальных символов
-        num_symbols = int.from_bytes(f.read(1), "big")
-
-        # Восстанавливаем частоты символов
-        freq = {}
-        for _ in range(num_symbols):
-            byte = ord(f.read(1))  # Символ
-            count = int.from_bytes(f.read(2), "big")  # Его частота
-            freq[byte] = count
-
-        # Читаем сжатые данные и преобразуем в поток битов
-        data = f.read()
-        bit_stream = []
-        for byte in data:
+def read_bits(f, chunk_size=IO_CHUNK):
+    """Поток битов из файла: читается кусками, в памяти только текущий кусок"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        for byte in chunk:
             for i in range(7, -1, -1):  # Разбираем каждый бит
-                bit_stream.append((byte >> i) & 1)
+                yield (byte >> i) & 1
+
+
+def read_bytes(f, chunk_size=IO_CHUNK):
+    """Поток байтов из файла, читаемого кусками"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield from chunk
+
 
-    # Нормализуем частоты (как при кодировании)
-    normalized_freq = normalize_frequencies(freq, total)
-    prob_table, total_weight = build_probability_table(normalized_freq)
+def arithmetic_decode(bits, out, total, cumulative, total_weight):
+    """Потоковое декодирование с целочисленной арифметикой: bits - поток
+    битов сжатых данных (за его концом - нули), результат пишется в out"""
+    slots = build_slot_table(cumulative, total_weight)
+    mask = (1 << PRECISION) - 1
 
     # Инициализация декодера (аналогично кодировщику)
     low = 0
-    high = (1 << PRECISION) - 1
+    high = mask
     value = 0  # Здесь будем накапливать декодируемое значение
 
     # Читаем первые PRECISION бит для инициализации value
-    for i in range(PRECISION):
-        if bit_stream:
-            value = (value << 1) | bit_stream.pop(0)
-        else:
-            value = value << 1
+    for _ in range(PRECISION):
+        value = (value << 1) | next(bits, 0)
 
     # Декодирование
-    with open(output_file, "wb") as f:
-        for _ in range(total):  # Декодируем все символы
-            # Находим текущий символ по положению value в интервале
-            threshold = ((value - low + 1) * total_weight - 1) // (high - low + 1)
-
-            # Ищем символ, чей интервал содержит threshold
-            for byte, b_low, b_high in prob_table:
-                if b_low <= threshold < b_high:
-                    f.write(bytes([byte]))  # Записываем декодированный символ
-                    # Обновляем диапазон (как при кодировании)
-                    range_size = high - low + 1
-                    high = low + (range_size * b_high) // total_weight - 1
-                    low = low + (range_size * b_low) // total_weight
-                    break
-
-            # Масштабирование (аналогично кодировщику)
-            while ((low ^ high) & (1 << (PRECISION - 1))) == 0:
-                low = (low << 1) & ((1 << PRECISION) - 1)
-                high = ((high << 1) & ((1 << PRECISION) - 1)) | 1
-                # Читаем следующий бит в младший разряд value
-                if bit_stream:
-                    value = ((value << 1) & ((1 << PRECISION) - 1)) | bit_stream.pop(0)
-                else:
-                    value = (value << 1) & ((1 << PRECISION) - 1)
+    buffer = bytearray()
+    for _ in range(total):  # Декодируем все символы
+        # Находим текущий символ по положению value в интервале
+        threshold = ((value - low + 1) * total_weight - 1) // (high - low + 1)
+
+        # Символ, чей интервал содержит threshold: по таблице слотов
+        # или двоичным поиском по накопленным частотам
+        if slots is not None:
+            byte = slots[threshold]
+        else:
+            byte = bisect_right(cumulative, threshold) - 1
+        b_low = cumulative[byte]
+        b_high = cumulative[byte + 1]
+        buffer.append(byte)  # Записываем декодированный символ
+        if len(buffer) >= IO_CHUNK:  # Буферизация для эффективной записи
+            out.write(buffer)
+            buffer.clear()
+        # Обновляем диапазон (как при кодировании)
+        range_size = high - low + 1
+        high = low + (range_size * b_high) // total_weight - 1
+        low = low + (range_size * b_low) // total_weight
+
+        # Масштабирование (аналогично кодировщику)
+        while ((low ^ high) & (1 << (PRECISION - 1))) == 0:
+            low = (low << 1) & mask
+            high = ((high << 1) & mask) | 1
+            # Читаем следующий бит в младший разряд value
+            value = ((value << 1) & mask) | next(bits, 0)
+    out.write(buffer)
+
+
+def range_decode(source, out, total, cumulative, total_weight):
+    """Потоковое декодирование range coder (пара к range_encode)"""
+    slots = build_slot_table(cumulative, total_weight)
+
+    decoder = RangeDecoder(source)
+    buffer = bytearray()
+    for _ in range(total):
+        threshold = decoder.threshold(total_weight)
+        if slots is not None:
+            byte = slots[threshold]
+        else:
+            byte = bisect_right(cumulative, threshold) - 1
+        b_low = cumulative[byte]
+        decoder.decode(b_low, cumulative[byte + 1] - b_low)
+        buffer.append(byte)
+        if len(buffer) >= IO_CHUNK:  # Буферизация для эффективной записи
+            out.write(buffer)
+            buffer.clear()
+    out.write(buffer)
+
+
+def read_format(f):
+    """Формат сжатого файла по его первому байту"""
+    head = f.read(1)
+    if not head or head[0] >= len(FORMATS):
+        raise ValueError("неизвестный формат сжатого файла")
+    return FORMATS[head[0]]
+
+
+def decompress(input_file, output_file, expected=None):
+    """Распаковка файла любого формата: декодер выбирается по первому
+    байту. expected - формат, который файл обязан иметь (None - любой)."""
+    with open(input_file, "rb") as f, open(output_file, "wb") as out:
+        fmt = read_format(f)
+        if expected is not None and fmt != expected:
+            raise ValueError(f"файл сжат в формате {fmt}, а не {expected}")
+        if fmt == "adaptive":
+            decode_adaptive(f, out)
+        else:
+            decode_frames(f, out, fmt)
+
+
+def decode_frames(f, out, fmt):
+    """Распаковка кадров compress; в памяти находится один кадр"""
+    while True:
+        head = f.read(8)
+        if not head:
+            break
+        total = int.from_bytes(head, "big")
+        normalized_freq = read_model(f)
+        cumulative, total_weight = build_probability_table(normalized_freq)
+        payload = f.read(int.from_bytes(f.read(8), "big"))
+
+        if fmt == "range":
+            range_decode(iter(payload), out, total, cumulative, total_weight)
+        elif fmt == "rans":
+            rans_decode(iter(payload), out, total, cumulative, PROB_BITS, IO_CHUNK)
+        else:
+            bits = read_bits(io.BytesIO(payload))
+            arithmetic_decode(bits, out, total, cumulative, total_weight)
+
+
+def compress_adaptive(input_file, output_file):
+    """Однопроходное сжатие с адаптивной моделью: после номера формата
+    сразу идёт поток range coder, без модели.
+
+    Вход читается кусками по IO_CHUNK, поэтому размер файла не ограничен;
+    конец данных отмечается символом EOF.
+    """
+    model = FenwickModel()
+    encoder = RangeEncoder()
+    with open(input_file, "rb") as f, open(output_file, "wb") as out:
+        out.write(bytes([FORMATS.index("adaptive")]))
+        while True:
+            chunk = f.read(IO_CHUNK)
+            if not chunk:
+                break
+            for byte in chunk:
+                encoder.encode(model.low(byte), model.counts[byte], model.total)
+                model.update(byte)
+            out.write(encoder.take())
+        encoder.encode(model.low(EOF), model.counts[EOF], model.total)
+        encoder.finish()
+        out.write(encoder.take())
+
+    orig_size = os.path.getsize(input_file)
+    comp_size = os.path.getsize(output_file)
+    print(f"Степень сжатия: {orig_size/comp_size:.2f}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Использование:")
-        print("  Сжатие:   python main.py compress input.txt output.bin")
-        print("  Распаковка: python main.py decompress output.bin result.txt")
-        sys.exit(1)
+def decode_adaptive(f, out):
+    """Декодирование потока compress_adaptive до символа EOF"""
+    model = FenwickModel()
+    decoder = RangeDecoder(read_bytes(f))
+    buffer = bytearray()
+    while True:
+        symbol, low = model.find(decoder.threshold(model.total))
+        if symbol == EOF:
+            break
+        decoder.decode(low, model.counts[symbol])
+        model.update(symbol)
+        buffer.append(symbol)
+        if len(buffer) >= IO_CHUNK:  # Буферизация для эффективной записи
+            out.write(buffer)
+            buffer.clear()
+    out.write(buffer)
 
-    command = sys.argv[1]
-    input_file = sys.argv[2]
-    output_file = sys.argv[3]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        usage="""
+  Сжатие:   python main.py compress input.txt output.bin [--format range|rans|adaptive]
+  Распаковка: python main.py decompress output.bin result.txt"""
+    )
+    parser.add_argument("command")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="bitwise - побитовый арифметический кодер (по умолчанию), range - "
+        "байтовый range coder, rans - асимметричные системы счисления (rANS с "
+        "чередованием состояний), adaptive - range coder с адаптивной моделью; "
+        "формат записывается в файл, при распаковке он проверяется, если указан",
+    )
+    parser.add_argument(
+        "--frame-size",
+        type=int,
+        default=FRAME_SIZE,
+        help="размер кадра в байтах: у каждого кадра своя модель (по "
+        "умолчанию %(default)s)",
+    )
+    args = parser.parse_args()
+    if args.frame_size < 1:
+        parser.error("размер кадра должен быть положительным")
+
+    command = args.command
+    input_file = args.input_file
+    output_file = args.output_file
 
     if command == "compress":
-        compress(input_file, output_file)
+        fmt = args.format or "bitwise"
+        if fmt == "adaptive":
+            compress_adaptive(input_file, output_file)
+        else:
+            compress(input_file, output_file, fmt, args.frame_size)
     elif command == "decompress":
-        arithmetic_decode(input_file, output_file)
+        try:
+            decompress(input_file, output_file, args.format)
+        except ValueError as e:
+            print(f"Ошибка при распаковке: {e}")
+            exit(1)
     else:
         print("Ошибка: используйте 'compress' или 'decompress'")
@@ -0,0 +1,54 @@
+#!/bin/python3
+import contextlib
+import io
+import os
+import random
+import tempfile
+
+from main import FORMATS, compress, compress_adaptive, decompress
+
+# Проверка сжатия-распаковки всеми форматами на крайних случаях: каждый
+# декодер обязан восстановить вход байт в байт
+
+CASES = {
+    "пустой": b"",
+    "один байт": b"x",
+    "один символ": b"a" * 1000,
+    "все 256 байт": bytes(range(256)) * 4,
+    "случайные": random.Random(1).randbytes(50000),
+    "текст": b"abracadabra, " * 300 + bytes(range(32, 127)),
+}
+
+
+def roundtrip(data, fmt, frame_size, directory):
+    source = os.path.join(directory, "input")
+    packed = os.path.join(directory, "packed")
+    unpacked = os.path.join(directory, "unpacked")
+    with open(source, "wb") as f:
+        f.write(data)
+    # compress печатает степень сжатия - здесь она не нужна
+    with contextlib.redirect_stdout(io.StringIO()):
+        if fmt == "adaptive":
+            compress_adaptive(source, packed)
+        else:
+            compress(source, packed, fmt, frame_size)
+    decompress(packed, unpacked)
+    with open(unpacked, "rb") as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    failed = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in FORMATS:
+            # Маленький кадр - проверка входа из нескольких кадров (у
+            # адаптивного формата кадров нет)
+            frame_sizes = (1 << 22,) if fmt == "adaptive" else (1 << 22, 100)
+            for frame_size in frame_sizes:
+                for name, data in CASES.items():
+                    restored = roundtrip(data, fmt, frame_size, directory)
+                    if restored != data:
+                        failed += 1
+                        print(f"{fmt}, кадр {frame_size}, {name}: не восстановлено")
+    assert failed == 0, f"ошибок: {failed}"
+    print("Все форматы восстанавливают данные")
@@ -0,0 +1,139 @@
+class BitWriter:
+    """Побитовая запись: биты копятся в целочисленном регистре, целые байты
+    сбрасываются в bytearray data. Старший бит идёт первым."""
+
+    # Сколько бит копить в регистре перед сбросом целых байт
+    FLUSH_BITS = 64
+
+    def __init__(self):
+        self.data = bytearray()
+        self._bits = 0  # регистр с ещё не сброшенными битами
+        self._count = 0  # число бит в регистре
+
+    def _flush(self):
+        rest = self._count & 7
+        self.data += (self._bits >> rest).to_bytes(self._count >> 3, "big")
+        self._bits &= (1 << rest) - 1
+        self._count = rest
+
+    def write(self, value, count):
+        """Записывает младшие count бит value"""
+        self._bits = (self._bits << count) | value
+        self._count += count
+        if self._count >= self.FLUSH_BITS:
+            self._flush()
+
+    def writeCodes(self, data, codes, lengths):
+        """Записывает код каждого байта data: codes[byte] длиной lengths[byte]
+
+        Общий цикл для префиксных кодов (Хаффман, Шеннон-Фано) без вызова
+        метода на каждый символ.
+        """
+        out = self.data
+        bits = self._bits
+        count = self._count
+        for byte in data:
+            bits = (bits << lengths[byte]) | codes[byte]
+            count += lengths[byte]
+            if count >= self.FLUSH_BITS:
+                rest = count & 7
+                out += (bits >> rest).to_bytes(count >> 3, "big")
+                bits &= (1 << rest) - 1
+                count = rest
+        self._bits = bits
+        self._count = count
+
+    def align(self):
+        """Дописывает нули до границы байта, возвращает их количество"""
+        pad = -self._count & 7
+        self._bits <<= pad
+        self._count += pad
+        self._flush()
+        return pad
+
+    def take(self):
+        """Забирает сброшенные целые байты (для потоковой записи)"""
+        data = bytes(self.data)
+        self.data.clear()
+        return data
+
+    def getvalue(self):
+        """Выравнивает поток до байта и возвращает все байты"""
+        self.align()
+        return bytes(self.data)
+
+
+class BitReader:
+    """Побитовое чтение из bytes/memoryview через целочисленный регистр.
+
+    peek/skip позволяют табличным декодерам смотреть вперёд на длину
+    самого длинного кода и потом пропускать только реально занятые биты.
+    За концом данных читаются нули.
+    """
+
+    # Сколько байт подгружается в регистр за раз
+    FILL_BYTES = 8
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self._next = pos >> 3  # индекс следующего байта для регистра
+        self._bits = 0
+        self._count = 0
+        if pos & 7:
+            self.skip(pos & 7)
+
+    def tell(self):
+        """Позиция в битах от начала data"""
+        return self._next * 8 - self._count
+
+    def remaining(self):
+        """Сколько бит осталось до конца data"""
+        return len(self.data) * 8 - self.tell()
+
+    def _fill(self, count):
+        while self._count < count:
+            chunk = self.data[self._next : self._next + self.FILL_BYTES]
+            if not chunk:  # за концом данных - нули
+                size = (count - self._count + 7) >> 3
+                self._bits <<= size * 8
+                self._count += size * 8
+                self._next += size
+                return
+            self._bits = (self._bits << (len(chunk) * 8)) | int.from_bytes(chunk, "big")
+            self._count += len(chunk) * 8
+            self._next += len(chunk)
+
+    def peek(self, count):
+        """Следующие count бит без продвижения позиции"""
+        if self._count < count:
+            self._fill(count)
+        return (self._bits >> (self._count - count)) & ((1 << count) - 1)
+
+    def skip(self, count):
+        """Пропускает count бит"""
+        if self._count < count:
+            self._fill(count)
+        self._count -= count
+        self._bits &= (1 << self._count) - 1
+
+    def read(self, count):
+        """Читает count бит как беззнаковое число"""
+        if self._count < count:
+            self._fill(count)
+        self._count -= count
+        value = self._bits >> self._count
+        self._bits &= (1 << self._count) - 1
+        return value
+
+    def align(self):
+        """Пропускает биты до границы байта"""
+        self.skip(self._count & 7)
+
+    def readBytes(self, count):
+        """Читает count целых байт (позиция должна быть выровнена)"""
+        self.align()
+        start = self.tell() >> 3
+        self._next = start + count
+        self._bits = 0
+        self._count = 0
+        return self.data[start : start + count]
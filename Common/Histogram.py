@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def _asArray(data):
+    """Байты как массив uint8 без копирования (для bytes/bytearray/memoryview)"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return np.frombuffer(data, dtype=np.uint8)
+    return np.asarray(data, dtype=np.uint8)
+
+
+def countFrequencies(data):
+    """Частоты байт за один проход: {байт: количество} только для встреченных"""
+    counts = np.bincount(_asArray(data), minlength=256)
+    return {int(byte): int(counts[byte]) for byte in np.flatnonzero(counts)}
+
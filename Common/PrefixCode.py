@@ -0,0 +1,80 @@
+import heapq
+
+
+def packageMerge(frequencyDict, maxLen):
+    """Оптимальные длины кодов не длиннее maxLen (алгоритм package-merge)
+
+    Возвращает {символ: длина}. На каждом из maxLen - 1 уровней соседние
+    элементы списка объединяются в пакеты и сливаются с исходными листьями;
+    длина кода символа равна числу его вхождений в первые 2n - 2 элемента.
+    """
+    symbols = sorted(frequencyDict, key=lambda char: (frequencyDict[char], char))
+    n = len(symbols)
+    if n == 1:
+        return {symbols[0]: 1}
+    if (1 << maxLen) < n:
+        raise ValueError(f"{n} символов не закодировать кодами длины {maxLen}")
+
+    # Элемент списка - (вес, символы, входящие в пакет)
+    leaves = [(frequencyDict[char], (char,)) for char in symbols]
+    current = leaves
+    for _ in range(maxLen - 1):
+        packages = [
+            (current[i][0] + current[i + 1][0], current[i][1] + current[i + 1][1])
+            for i in range(0, len(current) - 1, 2)
+        ]
+        current = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+
+    lengths = dict.fromkeys(symbols, 0)
+    for _, chars in current[: 2 * n - 2]:
+        for char in chars:
+            lengths[char] += 1
+    return lengths
+
+
+def canonicalCodes(lengths):
+    """Канонические коды по длинам: {символ: длина} -> {символ: (код, длина)}
+
+    Коды одной длины идут подряд в порядке возрастания символов.
+    firstCode[l] - первый код длины l, offset[l] - номер первого символа
+    длины l в списке символов, упорядоченном по (длина, символ).
+    """
+    maxLen = max(lengths.values())
+    blCount = [0] * (maxLen + 1)
+    for length in lengths.values():
+        blCount[length] += 1
+    firstCode = [0] * (maxLen + 1)
+    offset = [0] * (maxLen + 1)
+    code = 0
+    for length in range(1, maxLen + 1):
+        code = (code + blCount[length - 1]) << 1
+        firstCode[length] = code
+        offset[length] = offset[length - 1] + blCount[length - 1]
+    ordered = sorted(lengths, key=lambda char: (lengths[char], char))
+    codes = {}
+    for length in range(1, maxLen + 1):
+        for i in range(blCount[length]):
+            codes[ordered[offset[length] + i]] = (firstCode[length] + i, length)
+    return codes
+
+
+def flatTable(codes):
+    """Плоская таблица декодирования по кодам {символ: (код, длина)}:
+    (maxLen, символы, длины). Элемент с индексом - следующие maxLen бит
+    потока - хранит символ, чей код с них начинается, и длину этого кода
+    (0 - такого кода нет)."""
+    maxLen = max(length for _, length in codes.values())
+    symbols = [0] * (1 << maxLen)
+    sizes = [0] * (1 << maxLen)
+    for symbol, (code, length) in codes.items():
+        start = code << (maxLen - length)
+        stop = (code + 1) << (maxLen - length)
+        symbols[start:stop] = [symbol] * (stop - start)
+        sizes[start:stop] = [length] * (stop - start)
+    return maxLen, symbols, sizes
+
+
+def decodeTable(lengths):
+    """Плоская таблица декодирования канонических кодов по их длинам
+    {символ: длина}, см. flatTable"""
+    return flatTable(canonicalCodes(lengths))
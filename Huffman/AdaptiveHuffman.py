@@ -0,0 +1,196 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.BitIO import BitWriter
+
+# Служебный символ конца потока: кодируется как новый символ (NYT + 9 бит)
+EOF = 256
+SYMBOL_BITS = 9
+# Листья 256 байт и EOF плюс узел NYT: всего 2 * 257 - 1 узлов
+MAX_NODES = 2 * (EOF + 1) - 1
+ROOT = MAX_NODES - 1
+
+
+class AdaptiveHuffmanTree:
+    """Дерево адаптивного кода Хаффмана (алгоритм FGK).
+
+    Узлы хранятся по номерам в порядке неубывания веса (свойство
+    соседства); корень имеет наибольший номер. Номер - это позиция, а не
+    сам узел: при обмене двух узлов местами меняется их содержимое
+    (символ и дети), а ссылки на родителя остаются у позиций.
+    Новый символ передаётся кодом узла NYT ("ещё не встречался") и
+    9 битами самого символа.
+    """
+
+    def __init__(self):
+        self.weight = [-1] * MAX_NODES  # -1 - позиция ещё не занята
+        self.parent = [-1] * MAX_NODES
+        self.left = [-1] * MAX_NODES  # -1 у листьев
+        self.right = [-1] * MAX_NODES
+        self.symbol = [-1] * MAX_NODES  # символ листа, -1 у внутренних и NYT
+        self.leaf = {}  # символ -> позиция его листа
+        self.nyt = ROOT
+        self.weight[ROOT] = 0
+        # leader[w] - наибольшая позиция узла с весом w (лидер блока)
+        self.leader = {0: ROOT}
+
+    def _swap(self, i, j):
+        """Меняет местами поддеревья на позициях i и j (веса равны)"""
+        symbol, left, right = self.symbol, self.left, self.right
+        symbol[i], symbol[j] = symbol[j], symbol[i]
+        left[i], left[j] = left[j], left[i]
+        right[i], right[j] = right[j], right[i]
+        for node in (i, j):
+            if left[node] >= 0:
+                self.parent[left[node]] = node
+                self.parent[right[node]] = node
+            elif symbol[node] < 0:
+                self.nyt = node
+            else:
+                self.leaf[symbol[node]] = node
+
+    def _increment(self, node):
+        weight = self.weight
+        w = weight[node]
+        if self.leader.get(w) == node:
+            if node > 0 and weight[node - 1] == w:
+                self.leader[w] = node - 1
+            else:
+                del self.leader[w]
+        weight[node] = w + 1
+        if self.leader.get(w + 1, -1) < node:
+            self.leader[w + 1] = node
+
+    def code(self, symbol):
+        """Код символа (число, длина); для нового символа - код NYT"""
+        node = self.leaf.get(symbol, self.nyt)
+        code = 0
+        length = 0
+        while node != ROOT:
+            parent = self.parent[node]
+            if self.right[parent] == node:
+                code |= 1 << length
+            length += 1
+            node = parent
+        return code, length
+
+    def update(self, symbol):
+        """Учитывает очередное появление символа и перестраивает дерево"""
+        node = self.leaf.get(symbol)
+        if node is None:
+            # NYT рождает новый NYT (левый ребёнок) и лист символа (правый)
+            old = self.nyt
+            self.left[old] = old - 2
+            self.right[old] = old - 1
+            self.parent[old - 2] = self.parent[old - 1] = old
+            self.symbol[old - 1] = symbol
+            self.leaf[symbol] = old - 1
+            self.nyt = old - 2
+            self.weight[old - 2] = 0
+            self.weight[old - 1] = 1
+            self.weight[old] = 1
+            self.leader[0] = old - 2
+            if self.leader.get(1, -1) < old:
+                self.leader[1] = old
+            if old == ROOT:
+                return
+            node = self.parent[old]
+
+        leader = self.leader
+        weight = self.weight
+        parent = self.parent
+        while True:
+            # Перед увеличением веса узел переносится на место лидера блока
+            top = leader[weight[node]]
+            if top != node and top != parent[node]:
+                self._swap(node, top)
+                node = top
+            self._increment(node)
+            if node == ROOT:
+                return
+            node = parent[node]
+
+
+class AdaptiveHuffmanEncoder:
+    """Однопроходное сжатие без заголовка: данные подаются по частям feed,
+    каждый вызов возвращает уже готовые байты, finish дописывает EOF."""
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.writer = BitWriter()
+
+    def feed(self, data):
+        tree = self.tree
+        write = self.writer.write
+        for byte in data:
+            code, length = tree.code(byte)
+            write(code, length)
+            if byte not in tree.leaf:
+                write(byte, SYMBOL_BITS)
+            tree.update(byte)
+        return self.writer.take()
+
+    def finish(self):
+        code, length = self.tree.code(EOF)  # EOF всегда передаётся через NYT
+        self.writer.write(code, length)
+        self.writer.write(EOF, SYMBOL_BITS)
+        self.writer.align()
+        return self.writer.take()
+
+
+class AdaptiveHuffmanDecoder:
+    """Декодер потока AdaptiveHuffmanEncoder; feed принимает сжатые данные
+    по частям и возвращает уже восстановленные байты."""
+
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.node = ROOT  # где остановился спуск по дереву
+        # Сколько бит нового символа уже прочитано, -1 - идёт спуск по дереву.
+        # Пока дерево пустое, корень сам является NYT и код у него пустой.
+        self.rawBits = 0
+        self.rawValue = 0
+        self.finished = False
+
+    def feed(self, data):
+        if self.finished:  # после EOF данные не читаются
+            return b""
+        tree = self.tree
+        left = tree.left
+        right = tree.right
+        out = bytearray()
+        node = self.node
+        rawBits = self.rawBits
+        rawValue = self.rawValue
+        for byte in data:
+            for shift in range(7, -1, -1):
+                bit = (byte >> shift) & 1
+                if rawBits >= 0:
+                    # Читаем 9 бит нового символа после кода NYT
+                    rawValue = (rawValue << 1) | bit
+                    rawBits += 1
+                    if rawBits < SYMBOL_BITS:
+                        continue
+                    rawBits = -1
+                    if rawValue == EOF:
+                        self.finished = True
+                        return bytes(out)
+                    out.append(rawValue)
+                    tree.update(rawValue)
+                    node = ROOT
+                    continue
+
+                node = right[node] if bit else left[node]
+                if left[node] >= 0:  # внутренний узел - спускаемся дальше
+                    continue
+                if node == tree.nyt:
+                    rawBits = 0
+                    rawValue = 0
+                else:
+                    out.append(tree.symbol[node])
+                    tree.update(tree.symbol[node])
+                    node = ROOT
+        self.node = node
+        self.rawBits = rawBits
+        self.rawValue = rawValue
+        return bytes(out)
@@ -1,10 +1,40 @@
 #!/bin/python3
+import argparse
 import heapq
+import io
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
+from AdaptiveHuffman import AdaptiveHuffmanDecoder, AdaptiveHuffmanEncoder
 from Node import *
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.BitIO import BitReader, BitWriter
+from Common.Histogram import countFrequencies
+from Common.PrefixCode import canonicalCodes, flatTable, packageMerge
+
+# Сколько байт сжатых данных декодируется между записями в файл
+DECODE_CHUNK = 1 << 16
+
+# Коды не длиннее этого декодируются одной плоской таблицей на 2^maxLen
+# элементов, более длинные - автоматом из buildDecodeTable
+FLAT_TABLE_BITS = 15
+# Автомат разбирает байт за шаг и быстрее плоской таблицы, но его таблицы
+# (256 элементов на каждый внутренний узел) окупаются только на данных
+# длиннее этого числа байт на один символ алфавита
+FSM_BYTES_PER_SYMBOL = 2048
+
+# Размер блока по умолчанию при потоковом сжатии
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Флаги в байте заголовка вместе с числом бит дополнения (младшие 3 бита)
+CANONICAL = 1 << 3  # в заголовке только длины кодов
+BLOCK = 1 << 4  # за заголовком 4 байта длины блока, после блока идёт следующий
+INDEX = 1 << 5  # не блок, а индекс: размер блока, их число и смещения
+
 
 def ReadText(file_name):
     try:
@@ -15,6 +45,24 @@ def ReadText(file_name):
         exit(0)
 
 
+def OpenInput(file_name):
+    """Открывает входной файл для потокового чтения, "-" - стандартный ввод"""
+    if file_name == "-":
+        return sys.stdin.buffer
+    try:
+        return open(file_name, "rb")
+    except:
+        print("Файл не найден")
+        exit(0)
+
+
+def OpenOutput(file_name):
+    """Открывает выходной файл, "-" - стандартный вывод"""
+    if file_name == "-":
+        return sys.stdout.buffer
+    return open(file_name, "wb")
+
+
 def buildHuffmanTree(frequencyDict):
     heap = [Node(char, freq) for char, freq in frequencyDict.items()]
     heapq.heapify(heap)
@@ -28,100 +76,509 @@ def buildHuffmanTree(frequencyDict):
     return heap[0]
 
 
-def getCodes(node):
-    global frequencyDict
+def getCodes(node, codes):
     left = node.Left
     right = node.Right
     code_left = node.Value + "0"
     code_right = node.Value + "1"
     if left.Value != "":
-        frequencyDict[left.Value] = code_left
+        codes[left.Value] = code_left
     else:
         left.Value = code_left
-        getCodes(left)
+        getCodes(left, codes)
     if right.Value != "":
-        frequencyDict[right.Value] = code_right
+        codes[right.Value] = code_right
     else:
         right.Value = code_right
-        getCodes(right)
+        getCodes(right, codes)
 
 
-def compress(frequencyDict, text):
-    compr = ""
-    for char in text:
-        compr += frequencyDict[char]
-    fr = ""
-    maxLen = len(max(frequencyDict.values(), key=len))  # max_len_code
-    colvoBitForLen = len(bin(maxLen)) - 2
-    for char, value in frequencyDict.items():
-        fr += f"{char:08b}"  # add sumbol
-        fr += bin(len(value))[2:].zfill(colvoBitForLen)  # len
-        fr += value
+def buildCodes(frequencyDict, canonical=False, maxLen=None):
+    """Коды Хаффмана по частотам: {символ: частота} -> {символ: код}"""
+    if maxLen:
+        # Длины строятся без дерева, поэтому коды всегда канонические
+        lengths = packageMerge(frequencyDict, maxLen)
+    else:
+        codes = {}
+        head = buildHuffmanTree(frequencyDict)
+        if head.Left is None:  # единственный символ - дерево из одного листа
+            codes[head.Value] = "0"
+        else:
+            getCodes(head, codes)
+        if not canonical:
+            return codes
+        lengths = {char: len(code) for char, code in codes.items()}
+    return {
+        char: bin(code)[2:].zfill(length)
+        for char, (code, length) in canonicalCodes(lengths).items()
+    }
 
-    data = fr + compr
-    if len(data) % 8 != 0:
-        data += "0" * (8 - len(data) % 8)
 
-    original_size = len(text)
-    # +2 for lenDict and colvoBitForLen bytes
-    compressed_size = len(data) // 8 + 2
+def encodeBlock(text, canonical=False, maxLen=None, block=False):
+    """Сжимает text целиком в один блок: заголовок, таблица кодов, данные"""
+    frequencyDict = countFrequencies(text)  # Frequency analysis
+    frequencyDict = buildCodes(frequencyDict, canonical, maxLen)
+    maxCodeLen = len(max(frequencyDict.values(), key=len))  # max_len_code
+    colvoBitForLen = len(bin(maxCodeLen)) - 2
+
+    writer = BitWriter()
+    if canonical:
+        # Только длины в порядке символов - коды восстанавливаются по ним
+        for char in sorted(frequencyDict):
+            writer.write(char, 8)  # add sumbol
+            writer.write(len(frequencyDict[char]), colvoBitForLen)  # len
+    else:
+        for char, value in frequencyDict.items():
+            writer.write(char, 8)  # add sumbol
+            writer.write(len(value), colvoBitForLen)  # len
+            writer.write(int(value, 2), len(value))
+    # Таблица кодов выравнивается до байта, чтобы сжатые данные начинались
+    # с границы байта и их можно было декодировать целыми байтами
+    writer.align()
+
+    codes = [0] * 256
+    lengths = [0] * 256
+    for char, value in frequencyDict.items():
+        codes[char] = int(value, 2)
+        lengths[char] = len(value)
+    writer.writeCodes(text, codes, lengths)
+    pad = writer.align()
+    body = writer.data
+
+    flags = pad | (CANONICAL if canonical else 0) | (BLOCK if block else 0)
+    # 256 символов записывается как 0
+    header = bytes([len(frequencyDict) % 256, colvoBitForLen, flags])
+    if block:
+        header += len(body).to_bytes(4, "big")
+    return header + body
 
-    try:
-        with open(sys.argv[3], "wb") as file:
-            file.write(len(frequencyDict).to_bytes(1, "big"))
-            file.write(colvoBitForLen.to_bytes(1, "big"))
-            for i in range(0, len(data), 8):
-                file.write(int(data[i : i + 8], 2).to_bytes(1, "big"))
 
-        # Calculate and print compression ratio
+def printStats(original_size, compressed_size, file=sys.stdout):
+    # Calculate and print compression ratio
+    print(f"Original size: {original_size} bytes", file=file)
+    print(f"Compressed size: {compressed_size} bytes", file=file)
+    if compressed_size > 0:
         compression_ratio = original_size / compressed_size
-        print(f"Original size: {original_size} bytes")
-        print(f"Compressed size: {compressed_size} bytes")
-        print(f"Compression ratio: {compression_ratio:.2f}")
+        print(f"Compression ratio: {compression_ratio:.2f}", file=file)
 
+
+def compress(text, output_file, canonical=False, maxLen=None):
+    data = encodeBlock(text, canonical, maxLen) if text else b""
+    try:
+        with open(output_file, "wb") as file:
+            file.write(data)
+        printStats(len(text), len(data))
     except:
         print("Что-то не так")
 
 
-def decompress(text):
-    lenDict = text[0]
-    colvoBitLenCode = text[1]
-    text = "".join([bin(x)[2:].zfill(8) for x in text[2:]])
-    dic = dict()
+def compressBlocks(input, output, blockSize, canonical=False, maxLen=None):
+    """Сжимает поток блоками по blockSize байт, у каждого блока своя таблица.
+
+    Каждый блок записывается сразу после сжатия, поэтому в памяти
+    находится только текущий блок. Возвращает размеры входа и выхода.
+    """
+    original_size = 0
+    compressed_size = 0
+    while True:
+        text = input.read(blockSize)
+        if not text:
+            break
+        data = encodeBlock(text, canonical, maxLen, block=True)
+        output.write(data)
+        original_size += len(text)
+        compressed_size += len(data)
+    return original_size, compressed_size
+
+
+def mapInOrder(pool, func, items, window):
+    """Как pool.map, но в работе не больше window задач одновременно,
+    чтобы не держать в памяти весь вход. Результаты идут по порядку."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def readChunks(input, blockSize):
+    while True:
+        text = input.read(blockSize)
+        if not text:
+            break
+        yield text
+
+
+def compressParallel(input_file, output_file, blockSize, jobs, canonical=False, maxLen=None):
+    """Сжимает файл независимыми блоками в пуле процессов.
+
+    В начале файла пишется индекс: размер блока, число блоков и смещение
+    каждого блока от начала файла (по 8 байт). Индекс заполняется после
+    записи блоков, поэтому выходной файл должен поддерживать seek.
+    Возвращает размеры входа и выхода.
+    """
+    count = (os.path.getsize(input_file) + blockSize - 1) // blockSize
+    original_size = 0
+    with open(input_file, "rb") as input, open(output_file, "wb") as output:
+        output.write(bytes([0, 0, INDEX]))
+        output.write(blockSize.to_bytes(4, "big"))
+        output.write(count.to_bytes(4, "big"))
+        indexPos = output.tell()
+        output.write(bytes(8 * count))
+
+        offsets = []
+        encode = partial(encodeBlock, canonical=canonical, maxLen=maxLen, block=True)
+        with ProcessPoolExecutor(jobs) as pool:
+            chunks = readChunks(input, blockSize)
+            for data in mapInOrder(pool, encode, chunks, 2 * jobs):
+                offsets.append(output.tell())
+                output.write(data)
+        original_size = input.tell()
+        compressed_size = output.tell()
+
+        output.seek(indexPos)
+        for offset in offsets:
+            output.write(offset.to_bytes(8, "big"))
+    return original_size, compressed_size
+
+
+def compressAdaptive(input, output, chunkSize=DECODE_CHUNK):
+    """Адаптивный Хаффман за один проход: без заголовка и таблицы кодов,
+    вход читается и сжимается кусками по мере поступления"""
+    encoder = AdaptiveHuffmanEncoder()
+    original_size = 0
+    compressed_size = 0
+    while True:
+        text = input.read1(chunkSize)  # не ждём заполнения всего куска из канала
+        if not text:
+            break
+        data = encoder.feed(text)
+        output.write(data)
+        original_size += len(text)
+        compressed_size += len(data)
+    data = encoder.finish()
+    output.write(data)
+    return original_size, compressed_size + len(data)
+
+
+def decompressAdaptive(input, output, chunkSize=DECODE_CHUNK):
+    decoder = AdaptiveHuffmanDecoder()
+    while not decoder.finished:
+        data = input.read1(chunkSize)  # не ждём заполнения всего куска из канала
+        if not data:
+            break
+        output.write(decoder.feed(data))
+
+
+def decodeFlat(payload, pad, codes, file):
+    """Декодирование по плоской таблице с битовым регистром"""
+    maxLen, symbols, lengths = flatTable(codes)
+    mask = (1 << maxLen) - 1
+    bits = 0  # битовый регистр
+    count = 0  # число ещё не разобранных бит в регистре
+    out = bytearray()
+    last = len(payload) - 1
+    for start in range(0, last, DECODE_CHUNK):
+        for byte in payload[start : min(start + DECODE_CHUNK, last)]:
+            bits = ((bits << 8) | byte) & ((1 << (maxLen + 8)) - 1)
+            count += 8
+            # Пока в регистре есть maxLen бит, код целиком попадает в окно
+            while count >= maxLen:
+                index = (bits >> (count - maxLen)) & mask
+                out.append(symbols[index])
+                count -= lengths[index]
+        file.write(out)
+        out.clear()
+    # Последний байт - без бит дополнения; хвост короче maxLen добиваем нулями
+    if last >= 0:
+        bits = ((bits << 8) | payload[last]) >> pad
+        count += 8 - pad
+        while count > 0:
+            if count >= maxLen:
+                index = (bits >> (count - maxLen)) & mask
+            else:
+                index = (bits << (maxLen - count)) & mask
+            if not 0 < lengths[index] <= count:
+                break
+            out.append(symbols[index])
+            count -= lengths[index]
+        file.write(out)
+
+
+def buildDecodeTable(codes):
+    """Строит автомат для побайтового декодирования.
+
+    Состояние - внутренний узел дерева кодов. Для каждой пары
+    (состояние, входной байт) заранее вычисляются символы, которые будут
+    декодированы из этих 8 бит, и узел, в котором окажется декодер.
+    Таблицы плоские: индекс = (состояние << 8) | байт.
+    """
+    # children[node] = [левый, правый]; лист хранится как -1 - символ
+    children = [[None, None]]
+    for symbol, (code, length) in codes.items():
+        node = 0
+        for shift in range(length - 1, 0, -1):
+            bit = (code >> shift) & 1
+            if children[node][bit] is None:
+                children.append([None, None])
+                children[node][bit] = len(children) - 1
+            node = children[node][bit]
+        children[node][code & 1] = -1 - symbol
+
+    emit = []
+    nextState = []
+    for state in range(len(children)):
+        for byte in range(256):
+            node = state
+            out = bytearray()
+            for shift in range(7, -1, -1):
+                child = children[node][(byte >> shift) & 1]
+                if child is None:  # такого кода нет - начинаем с корня
+                    node = 0
+                elif child < 0:
+                    out.append(-1 - child)
+                    node = 0
+                else:
+                    node = child
+            emit.append(bytes(out))
+            nextState.append(node << 8)
+    return emit, nextState, children
+
+
+def decodeBlock(header, body, file):
+    """Декодирует один блок (заголовок уже прочитан) и пишет результат в file"""
+    lenDict = header[0] or 256
+    colvoBitLenCode = header[1]
+    pad = header[2] & 7
+    canonical = header[2] & CANONICAL
+    reader = BitReader(memoryview(body))
+    codes = dict()
     for _ in range(lenDict):
-        key = int(text[:8], 2)
-        lenCode = int(text[8 : 8 + colvoBitLenCode], 2)
-        value = text[8 + colvoBitLenCode : 8 + colvoBitLenCode + lenCode]
-        text = text[8 + colvoBitLenCode + lenCode :]
-        dic[value] = key
-    try:
-        with open(sys.argv[3], "wb") as file:
-            while len(text) > 0:
-                code = ""
-                while code not in dic.keys():
-                    code += text[0]
-                    text = text[1:]
-                file.write(dic[code].to_bytes(1, "big"))
-    except:
-        exit(0)
+        key = reader.read(8)
+        lenCode = reader.read(colvoBitLenCode)
+        if canonical:
+            codes[key] = lenCode
+        else:
+            codes[key] = (reader.read(lenCode), lenCode)
+    if canonical:
+        codes = canonicalCodes(codes)
+    reader.align()
+    payload = reader.readBytes(reader.remaining() >> 3)
+
+    if (
+        max(length for _, length in codes.values()) <= FLAT_TABLE_BITS
+        and len(payload) < len(codes) * FSM_BYTES_PER_SYMBOL
+    ):
+        decodeFlat(payload, pad, codes, file)
+        return
+
+    emit, nextState, children = buildDecodeTable(codes)
+    state = 0
+    out = bytearray()
+    last = len(payload) - 1
+    # Все байты, кроме последнего, декодируются по таблице целиком
+    for start in range(0, last, DECODE_CHUNK):
+        for byte in payload[start : min(start + DECODE_CHUNK, last)]:
+            index = state | byte
+            out += emit[index]
+            state = nextState[index]
+        file.write(out)
+        out.clear()
+    # В последнем байте учитываем только значащие биты
+    if last >= 0:
+        node = state >> 8
+        for shift in range(7, pad - 1, -1):
+            child = children[node][(payload[last] >> shift) & 1]
+            if child is None:
+                node = 0
+            elif child < 0:
+                out.append(-1 - child)
+                node = 0
+            else:
+                node = child
+        file.write(out)
+
+
+def readIndex(input):
+    """Читает индекс блоков после заголовка: (размер блока, смещения)"""
+    blockSize = int.from_bytes(input.read(4), "big")
+    count = int.from_bytes(input.read(4), "big")
+    index = input.read(8 * count)
+    offsets = [int.from_bytes(index[i : i + 8], "big") for i in range(0, len(index), 8)]
+    return blockSize, offsets
+
+
+def readBlock(input):
+    """Читает следующий блок: (заголовок, тело) или None в конце потока"""
+    header = input.read(3)
+    if len(header) < 3:
+        return None
+    if header[2] & INDEX:  # при последовательном чтении индекс не нужен
+        readIndex(input)
+        return readBlock(input)
+    if header[2] & BLOCK:
+        size = int.from_bytes(input.read(4), "big")
+        body = input.read(size)
+    else:
+        body = input.read()
+    return header, body
+
+
+def decodeBlockBytes(block):
+    """Декодирует блок (заголовок, тело) в памяти - для пула процессов"""
+    file = io.BytesIO()
+    decodeBlock(*block, file)
+    return file.getvalue()
+
+
+def decompress(input, file):
+    """Распаковывает поток блоков из input в file по одному блоку"""
+    while True:
+        block = readBlock(input)
+        if block is None:
+            break
+        decodeBlock(*block, file)
+
+
+def decompressParallel(input, file, jobs, blockIndex=None):
+    """Распаковывает файл с индексом блоков в пуле процессов.
+
+    Если задан blockIndex, распаковывается только этот блок - остальные
+    даже не читаются с диска.
+    """
+    header = input.read(3)
+    if len(header) < 3 or not header[2] & INDEX:
+        raise ValueError("В файле нет индекса блоков (сжат без --jobs)")
+    _, offsets = readIndex(input)
+    if blockIndex is not None:
+        if not 0 <= blockIndex < len(offsets):
+            raise ValueError(f"Блока {blockIndex} нет, всего блоков: {len(offsets)}")
+        input.seek(offsets[blockIndex])
+        decodeBlock(*readBlock(input), file)
+        return
+
+    def blocks():
+        for offset in offsets:
+            input.seek(offset)
+            yield readBlock(input)
+
+    with ProcessPoolExecutor(jobs) as pool:
+        for data in mapInOrder(pool, decodeBlockBytes, blocks(), 2 * jobs):
+            file.write(data)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print(
-            "Использование: python main.py compress/decompress input_file output_file"
-        )
-        exit(1)
-
-    text = ReadText(sys.argv[2])
-    if sys.argv[1] == "decompress":
-        decompress(text)
-    elif sys.argv[1] == "compress":
-        frequencyDict = {
-            char: text.count(char) for char in set(text)
-        }  # Frequency analysis
-        head = buildHuffmanTree(frequencyDict)
-        getCodes(head)
-        compress(frequencyDict, text)
+    parser = argparse.ArgumentParser(
+        usage="python main.py compress/decompress input_file output_file "
+        "[--canonical] [--max-len N] [--block-size N] [--jobs N] [--block-index K] [--adaptive]"
+    )
+    parser.add_argument("command")
+    parser.add_argument("input_file", help='"-" - стандартный ввод')
+    parser.add_argument("output_file", help='"-" - стандартный вывод')
+    parser.add_argument(
+        "--canonical",
+        action="store_true",
+        help="канонические коды: в заголовке только длины кодов",
+    )
+    parser.add_argument(
+        "--max-len",
+        type=int,
+        help="ограничить длину кода (package-merge), например 12 или 15",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        help="сжимать потоком блоками по N байт со своей таблицей кодов",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="сжимать/распаковывать блоки в N процессах (файл с индексом блоков)",
+    )
+    parser.add_argument(
+        "--block-index",
+        type=int,
+        help="распаковать только блок с номером K (нужен индекс блоков)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="адаптивный Хаффман (FGK) за один проход, без заголовка; "
+        "нужен и при распаковке",
+    )
+    args = parser.parse_args()
+    if args.block_size is not None and args.block_size < 1:
+        parser.error("--block-size должен быть положительным")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs должен быть положительным")
+    if args.max_len and (1 << args.max_len) < 256:
+        # Проверяем заранее: в блоке может встретиться любой из 256 символов
+        if args.block_size or args.jobs or args.input_file == "-":
+            parser.error(f"--max-len {args.max_len} не вмещает 256 символов")
+
+    if args.command == "decompress":
+        input = OpenInput(args.input_file)
+        try:
+            output = OpenOutput(args.output_file)
+        except:
+            exit(0)
+        with input, output:
+            if args.adaptive:
+                decompressAdaptive(input, output)
+            elif args.jobs or args.block_index is not None:
+                try:
+                    decompressParallel(
+                        input, output, args.jobs or os.cpu_count(), args.block_index
+                    )
+                except ValueError as e:
+                    parser.error(str(e))
+            else:
+                decompress(input, output)
+    elif args.command == "compress":
+        if args.adaptive:
+            input = OpenInput(args.input_file)
+            output = OpenOutput(args.output_file)
+            with input, output:
+                sizes = compressAdaptive(input, output)
+            printStats(*sizes, sys.stderr if args.output_file == "-" else sys.stdout)
+            exit(0)
+        if args.jobs:
+            if "-" in (args.input_file, args.output_file):
+                parser.error("--jobs работает только с файлами, не с потоками")
+            try:
+                sizes = compressParallel(
+                    args.input_file,
+                    args.output_file,
+                    args.block_size or DEFAULT_BLOCK_SIZE,
+                    args.jobs,
+                    args.canonical,
+                    args.max_len,
+                )
+            except FileNotFoundError:
+                print("Файл не найден")
+                exit(0)
+            printStats(*sizes)
+            exit(0)
+        if args.block_size or args.input_file == "-":
+            input = OpenInput(args.input_file)
+            output = OpenOutput(args.output_file)
+            with input, output:
+                sizes = compressBlocks(
+                    input,
+                    output,
+                    args.block_size or DEFAULT_BLOCK_SIZE,
+                    args.canonical,
+                    args.max_len,
+                )
+            # Статистику не смешиваем со сжатыми данными в stdout
+            printStats(*sizes, sys.stderr if args.output_file == "-" else sys.stdout)
+            exit(0)
+        text = ReadText(args.input_file)
+        try:
+            compress(text, args.output_file, args.canonical, args.max_len)
+        except ValueError as e:
+            parser.error(str(e))
     else:
         print("Не известная команда")
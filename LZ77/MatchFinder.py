@@ -0,0 +1,79 @@
+# Совпадения короче MIN_MATCH не выгоднее литерала; по первым MIN_MATCH
+# байтам строится ключ хеш-цепочки
+MIN_MATCH = 3
+
+
+class HashChainMatchFinder:
+    """Поиск совпадений LZ77 по хеш-цепочкам.
+
+    head[ключ] - последняя позиция, с которой начинаются эти 3 байта,
+    prev[pos % window] - предыдущая позиция с тем же ключом. Ключ - сами
+    3 байта (24 бита), поэтому все позиции цепочки совпадают с текущей
+    хотя бы на MIN_MATCH байт. prev - кольцевой буфер на window элементов:
+    позиции дальше окна всё равно не нужны, и память не растёт с входом.
+
+    Обход цепочки ограничен max_chain кандидатами, так что время на байт
+    зависит от глубины поиска, а не от размера окна.
+    """
+
+    def __init__(self, data, window=4096, max_length=64, max_chain=32):
+        if window < 1:
+            raise ValueError("размер окна должен быть положительным")
+        self.data = data
+        self.window = window
+        self.max_length = max_length
+        self.max_chain = max_chain
+        self.head = {}
+        self.prev = [-1] * window
+
+    def insert(self, pos):
+        """Добавляет позицию pos в цепочку её ключа"""
+        data = self.data
+        if pos + MIN_MATCH > len(data):
+            return
+        key = (data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]
+        self.prev[pos % self.window] = self.head.get(key, -1)
+        self.head[key] = pos
+
+    def rebase(self, cut):
+        """Сдвигает позиции на cut после удаления cut байт из начала data
+        (потоковое сжатие); cut кратен window, поэтому ячейки prev остаются
+        на своих местах. Позиции, ушедшие в минус, означают конец цепочки."""
+        self.head = {key: pos - cut for key, pos in self.head.items() if pos >= cut}
+        self.prev = [pos - cut if pos >= cut else -1 for pos in self.prev]
+
+    def find(self, pos, limit=None):
+        """Лучшее совпадение для pos: (смещение, длина), длина 0 - нет.
+
+        Длина не больше limit (по умолчанию - max_length и конец данных);
+        при равной длине выбирается меньшее смещение.
+        """
+        data = self.data
+        if limit is None:
+            limit = min(self.max_length, len(data) - pos)
+        if limit < MIN_MATCH:
+            return 0, 0
+        key = (data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]
+        candidate = self.head.get(key, -1)
+        window = self.window
+        prev = self.prev
+        best_offset = 0
+        best_length = 0
+        chain = self.max_chain
+        while candidate >= 0 and pos - candidate <= window and chain:
+            chain -= 1
+            # Кандидат не длиннее лучшего отсекается сравнением одного байта
+            if best_length == 0 or data[candidate + best_length] == data[pos + best_length]:
+                length = MIN_MATCH
+                while length < limit and data[candidate + length] == data[pos + length]:
+                    length += 1
+                if length > best_length:
+                    best_length = length
+                    best_offset = pos - candidate
+                    if length == limit:
+                        break
+            following = prev[candidate % window]
+            if following >= candidate:  # ячейка уже занята более новой позицией
+                break
+            candidate = following
+        return best_offset, best_length
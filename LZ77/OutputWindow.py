@@ -0,0 +1,58 @@
+# Сколько восстановленных байт копится сверх окна перед записью в файл
+FLUSH_SIZE = 1 << 20
+
+
+class OutputWindow:
+    """Выход декодера LZ77: восстановленные байты в data и окно для
+    ссылок назад.
+
+    Если задан file, всё, что старше keep байт от конца, периодически
+    записывается в него и удаляется из памяти, так что память ограничена
+    окном, а не размером результата. Без file data копит весь результат,
+    а take отдаёт его по частям, оставляя в памяти только окно.
+
+    preset - заранее заданный словарь: он сразу лежит в окне, но в
+    результат не попадает.
+    """
+
+    def __init__(self, file=None, keep=0, preset=b""):
+        self.data = bytearray(preset)
+        self.file = file
+        self.keep = keep
+        self.taken = len(preset)  # data[:taken] уже записано или отдано
+
+    def copy(self, offset, length):
+        """Дописывает length байт, начиная за offset байт от конца"""
+        data = self.data
+        start = len(data) - offset  # Начало совпадения
+        if offset >= length:  # Не перекрывается с дописываемым - один срез
+            data += data[start : start + length]
+            return
+        # Перекрытие: образец из offset байт повторяется до нужной длины
+        # (повторение bytearray копирует удвоением, без цикла по байтам)
+        data += (data[start:] * (length // offset + 1))[:length]
+
+    def flush(self, final=False):
+        """Записывает в file байты, которые уже не понадобятся окну"""
+        if self.file is None:
+            return
+        data = self.data
+        if final:
+            self.file.write(data[self.taken :])
+            data.clear()
+            self.taken = 0
+        elif len(data) >= self.keep + FLUSH_SIZE + self.taken:
+            cut = len(data) - self.keep
+            self.file.write(data[self.taken : cut])
+            del data[:cut]
+            self.taken = 0
+
+    def take(self):
+        """Забирает ещё не отданные байты; в data остаётся только окно"""
+        data = self.data
+        result = bytes(data[self.taken :])
+        cut = len(data) - self.keep
+        if cut > 0:
+            del data[:cut]
+        self.taken = len(data)
+        return result
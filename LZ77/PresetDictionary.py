@@ -0,0 +1,92 @@
+import heapq
+import zlib
+from collections import Counter
+
+from MatchFinder import HashChainMatchFinder
+
+# Размер обучаемого словаря по умолчанию и длина фрагментов, из которых
+# он собирается
+DICTIONARY_SIZE = 4096
+SEGMENT_SIZE = 32
+# Длина подстрок, по которым оценивается полезность фрагмента
+KGRAM = 8
+
+
+class PresetDictionary:
+    """Заранее заданный словарь: байты, которыми окно заполнено до начала
+    данных, и уже построенные по ним хеш-цепочки.
+
+    Словарь строится один раз и переиспользуется между вызовами compress:
+    каждый вызов получает копию цепочек вместо того, чтобы заново
+    добавлять в них каждую позицию словаря. Ссылки дальше окна
+    невозможны, поэтому хранятся только последние window байт. id -
+    контрольная сумма Adler-32 этих байт: она пишется в заголовок, и
+    распаковка проверяет, что ей передан тот же словарь.
+    """
+
+    def __init__(self, content, window=4096):
+        self.content = bytes(content[-window:])
+        self.window = window
+        self.id = zlib.adler32(self.content)
+        self._finder = HashChainMatchFinder(self.content, window)
+        for pos in range(len(self.content)):
+            self._finder.insert(pos)
+
+    def finder(self, data, max_length, max_chain):
+        """Поиск совпадений в data (данные, перед которыми стоит content)
+        с цепочками словаря"""
+        finder = HashChainMatchFinder(data, self.window, max_length, max_chain)
+        # Последние позиции словаря не добавлялись - за ними не было 3 байт
+        finder.head = dict(self._finder.head)
+        finder.prev = list(self._finder.prev)
+        for pos in range(max(0, len(self.content) - 2), len(self.content)):
+            finder.insert(pos)
+        return finder
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """Собирает словарь из образцов записей.
+
+    Фрагмент образца оценивается суммой по его подстрокам длины KGRAM:
+    в скольких образцах встречается подстрока. Фрагменты берутся жадно по
+    убыванию оценки, а подстроки, уже попавшие в словарь, перестают
+    приносить очки - так словарь не заполняется почти одинаковыми
+    фрагментами. Самые полезные фрагменты ставятся в конец: к ним ведут
+    самые короткие смещения.
+    """
+    counts = Counter()
+    for sample in samples:
+        counts.update({sample[i : i + KGRAM] for i in range(len(sample) - KGRAM + 1)})
+
+    segments = []
+    for sample in samples:
+        for start in range(0, len(sample), SEGMENT_SIZE):
+            segments.append(sample[start : start + SEGMENT_SIZE + KGRAM - 1])
+
+    covered = set()
+
+    def score(segment):
+        kgrams = {segment[i : i + KGRAM] for i in range(len(segment) - KGRAM + 1)}
+        return sum(counts[kgram] - 1 for kgram in kgrams - covered)
+
+    # Ленивый жадный выбор: оценка из кучи могла устареть, поэтому перед
+    # выбором она пересчитывается и фрагмент возвращается в кучу, если упала
+    heap = [(-score(segment), i) for i, segment in enumerate(segments)]
+    heapq.heapify(heap)
+    chosen = []
+    total = 0
+    while heap and total < size:
+        negative, i = heapq.heappop(heap)
+        current = score(segments[i])
+        if current <= 0:
+            continue
+        if current < -negative:
+            heapq.heappush(heap, (-current, i))
+            continue
+        segment = segments[i]
+        covered.update(
+            segment[j : j + KGRAM] for j in range(len(segment) - KGRAM + 1)
+        )
+        chosen.append(segment)
+        total += len(segment)
+    return b"".join(reversed(chosen))[-size:]
@@ -0,0 +1,142 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.BitIO import BitWriter
+from Common.PrefixCode import canonicalCodes, decodeTable, packageMerge
+
+# Второй этап сжатия токенов в духе deflate: литералы и длины совпадений
+# кодируются одной таблицей Хаффмана, смещения - другой, таблицы строятся
+# заново для каждого блока токенов.
+#
+# Алфавит литералов/длин: 0-255 - литерал, END_OF_BLOCK, затем коды длин.
+# Длина (от MIN_MATCH) и смещение (от 1) записываются кодом корзины и
+# дополнительными битами: значения 0-3 - сами себе коды, дальше на каждую
+# степень двойки по два кода, а младшие биты идут как есть.
+END_OF_BLOCK = 256
+FIRST_LENGTH_CODE = 257
+BLOCK_TOKENS = 1 << 14
+MAX_CODE_LEN = 15
+CODE_LEN_BITS = 4  # длина кода в таблице блока, 0 - символа нет
+LIT_COUNT_BITS = 9  # сколько символов алфавита литералов/длин в таблице
+DIST_COUNT_BITS = 6  # сколько кодов смещений в таблице
+
+
+def bucket(value):
+    """Код корзины для value >= 0: (код, число доп. бит, доп. биты)"""
+    if value < 4:
+        return value, 0, 0
+    bits = value.bit_length()
+    extra = bits - 2
+    return 2 * bits - 2 + ((value >> extra) & 1), extra, value & ((1 << extra) - 1)
+
+
+def bucket_base(code):
+    """Обратное к bucket: (наименьшее значение корзины, число доп. бит)"""
+    if code < 4:
+        return code, 0
+    extra = (code >> 1) - 1
+    return (2 | (code & 1)) << extra, extra
+
+
+def write_lengths(writer, lengths, count, count_bits):
+    """Таблица блока: число символов и длина кода каждого из них"""
+    writer.write(count, count_bits)
+    for symbol in range(count):
+        writer.write(lengths.get(symbol, 0), CODE_LEN_BITS)
+
+
+def read_lengths(reader, count_bits):
+    count = reader.read(count_bits)
+    lengths = {}
+    for symbol in range(count):
+        length = reader.read(CODE_LEN_BITS)
+        if length:
+            lengths[symbol] = length
+    return lengths
+
+
+def encode_tokens(tokens, min_match, block_tokens=BLOCK_TOKENS):
+    """Кодирует токены (смещение, длина, следующий символ) блоками.
+
+    Блок: [последний блок, 1 бит][таблица литералов/длин][таблица
+    смещений][коды символов ... END_OF_BLOCK]. Возвращает байты потока.
+    """
+    writer = BitWriter()
+    write = writer.write
+    for start in range(0, len(tokens), block_tokens):
+        block = tokens[start : start + block_tokens]
+
+        # Частоты символов обоих алфавитов в блоке
+        lit_freq = {END_OF_BLOCK: 1}
+        dist_freq = {}
+        for offset, length, char in block:
+            if length:
+                code = FIRST_LENGTH_CODE + bucket(length - min_match)[0]
+                lit_freq[code] = lit_freq.get(code, 0) + 1
+                code = bucket(offset - 1)[0]
+                dist_freq[code] = dist_freq.get(code, 0) + 1
+            lit_freq[char] = lit_freq.get(char, 0) + 1
+
+        lit_lengths = packageMerge(lit_freq, MAX_CODE_LEN)
+        lit_codes = canonicalCodes(lit_lengths)
+        write(1 if start + block_tokens >= len(tokens) else 0, 1)
+        write_lengths(writer, lit_lengths, max(lit_lengths) + 1, LIT_COUNT_BITS)
+        if dist_freq:
+            dist_lengths = packageMerge(dist_freq, MAX_CODE_LEN)
+            dist_codes = canonicalCodes(dist_lengths)
+            write_lengths(
+                writer, dist_lengths, max(dist_lengths) + 1, DIST_COUNT_BITS
+            )
+        else:
+            write(0, DIST_COUNT_BITS)
+
+        for offset, length, char in block:
+            if length:
+                code, extra, bits = bucket(length - min_match)
+                write(*lit_codes[FIRST_LENGTH_CODE + code])
+                write(bits, extra)
+                code, extra, bits = bucket(offset - 1)
+                write(*dist_codes[code])
+                write(bits, extra)
+            write(*lit_codes[char])
+        write(*lit_codes[END_OF_BLOCK])
+    return writer.getvalue()
+
+
+def decode_tokens(reader, min_match, window):
+    """Восстанавливает данные из потока encode_tokens (reader - BitReader)
+    в окно window (OutputWindow)"""
+    out = window.data
+    copy = window.copy
+    peek = reader.peek
+    skip = reader.skip
+    read = reader.read
+    final = 0
+    while not final:
+        final = read(1)
+        lit_lengths = read_lengths(reader, LIT_COUNT_BITS)
+        lit_bits, lit_symbols, lit_sizes = decodeTable(lit_lengths)
+        dist_lengths = read_lengths(reader, DIST_COUNT_BITS)
+        if dist_lengths:
+            dist_bits, dist_symbols, dist_sizes = decodeTable(dist_lengths)
+            # Окну нужно помнить самое дальнее смещение, возможное в блоке
+            base, extra = bucket_base(max(dist_lengths))
+            window.keep = max(window.keep, base + (1 << extra))
+
+        while True:
+            index = peek(lit_bits)
+            symbol = lit_symbols[index]
+            skip(lit_sizes[index])
+            if symbol < END_OF_BLOCK:
+                out.append(symbol)
+                continue
+            if symbol == END_OF_BLOCK:
+                break
+            base, extra = bucket_base(symbol - FIRST_LENGTH_CODE)
+            length = base + read(extra) + min_match
+            index = peek(dist_bits)
+            base, extra = bucket_base(dist_symbols[index])
+            skip(dist_sizes[index])
+            copy(base + read(extra) + 1, length)
+        window.flush()
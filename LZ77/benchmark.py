@@ -0,0 +1,34 @@
+#!/bin/python3
+import argparse
+import time
+
+from main import LEVELS, MapText, compress, decompress
+
+# Замер скорости и степени сжатия LZ77 на каждом уровне для одного файла
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py input_file [--levels 1 5 9] [--window 4096]"
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("--levels", type=int, nargs="+", default=sorted(LEVELS))
+    parser.add_argument("--window", type=int, default=4096)
+    args = parser.parse_args()
+
+    data = MapText(args.input_file)
+    print(f"{'уровень':>7} {'разбор':>8} {'цепочка':>7} {'размер':>10} "
+          f"{'степень':>8} {'сжатие, с':>10} {'КБ/с':>8}")
+    for level in args.levels:
+        strategy, chain, _ = LEVELS[level]
+        start = time.perf_counter()
+        compressed = compress(data, args.window, level=level)
+        elapsed = time.perf_counter() - start
+        # Каждый уровень обязан восстанавливать исходные данные
+        if bytes(decompress(compressed)) != bytes(data):
+            print(f"Уровень {level}: данные не восстановлены")
+            continue
+        ratio = len(data) / len(compressed) if compressed else 0
+        speed = len(data) / 1024 / elapsed if elapsed else 0
+        print(f"{level:>7} {strategy:>8} {chain:>7} {len(compressed):>10} "
+              f"{ratio:>8.3f} {elapsed:>10.3f} {speed:>8.0f}")
@@ -1,8 +1,17 @@
 #!/bin/python3
+import argparse
 import math
+import mmap
 import os
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.BitIO import BitReader, BitWriter
+from MatchFinder import MIN_MATCH, HashChainMatchFinder
+from OutputWindow import OutputWindow
+from PresetDictionary import PresetDictionary, train_dictionary
+from TokenCoder import decode_tokens, encode_tokens
+
 # Функция для чтения текста из файла
 
 
@@ -15,62 +24,247 @@ def ReadText(file_name):
         exit(0)
 
 
-# Функция сжатия данных по алгоритму LZ77
+def OpenInput(file_name):
+    """Файл для потокового чтения; "-" - стандартный ввод"""
+    if file_name == "-":
+        return sys.stdin.buffer
+    try:
+        return open(file_name, "rb")
+    except FileNotFoundError:
+        print("Файл не найден")
+        exit(0)
 
 
-def compress(data, search_buffer_size=4096, lookahead_buffer_size=64):
-    compressed = bytearray()  # Сжатые данные
-    search_buffer = bytearray()  # Буфер поиска (уже обработанные данные)
-    data = bytearray(data)  # Входные данные
-    tokens = []  # Список токенов (смещение, длина, следующий символ)
-
-    while len(data) > 0:
-        # Берем часть данных для поиска совпадений (упреждающий буфер)
-        lookahead_buffer = data[:lookahead_buffer_size]
-        best_offset = 0  # Лучшее найденное смещение
-        best_length = 0  # Максимальная длина совпадения
-        best_char = (
-            lookahead_buffer[0] if len(lookahead_buffer) > 0 else 0
-        )  # Следующий символ
-
-        # Поиск наилучшего совпадения в буфере поиска
-        for offset in range(1, min(len(search_buffer), search_buffer_size) + 1):
-            length = 0
-            # Проверяем совпадения символов
-            while (
-                length < len(lookahead_buffer)
-                and length < lookahead_buffer_size
-                and offset + length <= len(search_buffer)
-                and search_buffer[-offset + length] == lookahead_buffer[length]
-            ):
-                length += 1
-
-            # Обновляем лучший результат, если нашли более длинное совпадение
-            # или такое же, но с меньшим смещением
-            if length > best_length or (length == best_length and offset < best_offset):
-                best_length = length
-                best_offset = offset
-                if length < len(lookahead_buffer):
-                    best_char = lookahead_buffer[length]
-                else:
-                    best_char = 0
+def OpenOutput(file_name):
+    """Файл для потоковой записи; "-" - стандартный вывод"""
+    if file_name == "-":
+        return sys.stdout.buffer
+    return open(file_name, "wb")
+
+
+def MapText(file_name):
+    """Входной файл, отображённый в память, без копирования в список;
+    пустой файл отобразить нельзя - для него возвращаются пустые байты"""
+    try:
+        with open(file_name, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        print("Файл не найден")
+        exit(0)
+
+
+# Уровни сжатия: стратегия разбора, глубина хеш-цепочки и длина
+# совпадения, после которой его внутренние позиции не добавляются в цепочки
+LEVELS = {
+    1: ("greedy", 1, 4),
+    2: ("greedy", 4, 8),
+    3: ("greedy", 8, None),
+    4: ("lazy", 8, None),
+    5: ("lazy", 16, None),
+    6: ("lazy", 32, None),
+    7: ("lazy", 64, None),
+    8: ("lazy", 256, None),
+    9: ("optimal", 256, None),
+}
+DEFAULT_LEVEL = 6
+
+# Первый байт потокового формата и формата со словарём (в остальных
+# форматах это число бит смещения или 0, поэтому такие байты там не
+# встречаются)
+STREAM = 0xFF
+DICTIONARY = 0xFE
+# Токенов в блоке потока и с какого объёма данных за окном их пора удалять
+STREAM_BLOCK_TOKENS = 1 << 14
+STREAM_TRIM = 1 << 20
+# Размер куска при потоковом чтении входа
+IO_CHUNK = 1 << 16
+
+
+def insert_range(finder, start, stop, max_insert):
+    """Добавляет позиции [start, stop) в хеш-цепочки; у совпадения длиннее
+    max_insert добавляется только первая позиция"""
+    if max_insert is not None and stop - start > max_insert:
+        finder.insert(start)
+        return
+    for i in range(start, stop):
+        finder.insert(i)
+
+
+def parse_greedy(data, finder, lookahead_buffer_size, max_insert=None, start=0):
+    """Жадный разбор: в каждой позиции берётся лучшее найденное совпадение.
+
+    Все разборы проходят data от start до конца; совпадение не выходит
+    за конец data, поэтому разбор заканчивается ровно на len(data).
+    """
+    tokens = []
+    pos = start
+    while pos < len(data):
+        # За совпадением всегда остаётся следующий символ, поэтому
+        # совпадение не доходит до конца данных
+        best_offset, best_length = finder.find(
+            pos, min(lookahead_buffer_size, len(data) - pos - 1)
+        )
 
         # Формируем токен (смещение, длина, следующий символ)
-        if best_length >= 3:  # Если совпадение достаточно длинное
+        if best_length >= MIN_MATCH:  # Если совпадение достаточно длинное
+            best_char = data[pos + best_length]
             tokens.append((best_offset, best_length, best_char))
             move_length = (
                 best_length + 1
             )  # Сдвигаем окно на длину совпадения + 1 символ
         else:  # Если совпадений нет
-            tokens.append((0, 0, lookahead_buffer[0]))
+            tokens.append((0, 0, data[pos]))
             move_length = 1  # Сдвигаем окно на 1 символ
 
-        # Обновляем буферы
-        search_buffer.extend(lookahead_buffer[:move_length])
-        if len(search_buffer) > search_buffer_size:
-            # Поддерживаем размер буфера
-            search_buffer = search_buffer[-search_buffer_size:]
-        data = data[move_length:]  # Удаляем обработанные данные
+        # Пройденные позиции попадают в хеш-цепочки
+        insert_range(finder, pos, pos + move_length, max_insert)
+        pos += move_length
+    return tokens
+
+
+def parse_lazy(data, finder, lookahead_buffer_size, start=0):
+    """Ленивый разбор: перед тем как принять совпадение, проверяется
+    следующая позиция; если там совпадение длиннее, текущий байт уходит
+    литералом, а совпадение берётся со следующей позиции.
+
+    Литерал занимает целый токен, поэтому откладывать совпадение имеет
+    смысл, только если следующее длиннее больше чем на MIN_MATCH байт.
+    """
+    tokens = []
+    pos = start
+    offset, length = finder.find(pos, min(lookahead_buffer_size, len(data) - pos - 1))
+    while pos < len(data):
+        finder.insert(pos)
+        if length < MIN_MATCH:
+            tokens.append((0, 0, data[pos]))
+            pos += 1
+        else:
+            next_offset, next_length = finder.find(
+                pos + 1, min(lookahead_buffer_size, len(data) - pos - 2)
+            )
+            if next_length > length + MIN_MATCH:
+                tokens.append((0, 0, data[pos]))
+                pos += 1
+                offset, length = next_offset, next_length
+                continue
+            tokens.append((offset, length, data[pos + length]))
+            insert_range(finder, pos + 1, pos + length + 1, None)
+            pos += length + 1
+        if pos < len(data):
+            offset, length = finder.find(
+                pos, min(lookahead_buffer_size, len(data) - pos - 1)
+            )
+    return tokens
+
+
+def parse_optimal(data, finder, lookahead_buffer_size, start=0):
+    """Оптимальный разбор по модели стоимости.
+
+    Все токены записываются полями одной ширины, поэтому стоимость
+    разбора - число токенов. Сначала для каждой позиции находится самое
+    длинное совпадение (годится и любой его префикс от MIN_MATCH), затем
+    с конца считается cost[i] - наименьшее число токенов для data[i:], и
+    по нему выбирается разбор от начала.
+    """
+    # Индексы массивов считаются от start
+    n = len(data) - start
+    offsets = [0] * n
+    lengths = [0] * n
+    for i in range(n):
+        offsets[i], lengths[i] = finder.find(
+            start + i, min(lookahead_buffer_size, n - i - 1)
+        )
+        finder.insert(start + i)
+
+    cost = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        best = cost[i + 1]  # литерал
+        if lengths[i] >= MIN_MATCH:  # совпадение длины L ведёт в i + L + 1
+            best = min(best, min(cost[i + MIN_MATCH + 1 : i + lengths[i] + 2]))
+        cost[i] = best + 1
+
+    tokens = []
+    i = 0
+    while i < n:
+        target = cost[i] - 1
+        # Из равноценных вариантов берётся самое длинное совпадение
+        length = lengths[i]
+        while length >= MIN_MATCH and cost[i + length + 1] != target:
+            length -= 1
+        if length >= MIN_MATCH:
+            tokens.append((offsets[i], length, data[start + i + length]))
+            i += length + 1
+        else:
+            tokens.append((0, 0, data[start + i]))
+            i += 1
+    return tokens
+
+
+def parse(data, finder, strategy, lookahead_buffer_size, max_insert, start=0):
+    """Список токенов (смещение, длина, следующий символ) для data[start:]"""
+    if strategy == "optimal":
+        return parse_optimal(data, finder, lookahead_buffer_size, start)
+    if strategy == "lazy":
+        return parse_lazy(data, finder, lookahead_buffer_size, start)
+    return parse_greedy(data, finder, lookahead_buffer_size, max_insert, start)
+
+
+# Функция сжатия данных по алгоритму LZ77
+
+
+def compress(
+    data,
+    search_buffer_size=4096,
+    lookahead_buffer_size=64,
+    level=DEFAULT_LEVEL,
+    max_chain=None,
+    entropy=False,
+    dictionary=None,
+):
+    strategy, chain, max_insert = LEVELS[level]
+    if max_chain is not None:
+        chain = max_chain
+    if dictionary is not None:
+        # Окно начинается со словаря (его размер окна заменяет
+        # search_buffer_size), цепочки по нему уже построены.
+        # Заголовок: [DICTIONARY][id словаря, 4 байта], затем обычный блок
+        buffer = dictionary.content + bytes(data)
+        finder = dictionary.finder(buffer, lookahead_buffer_size, chain)
+        tokens = parse(
+            buffer,
+            finder,
+            strategy,
+            lookahead_buffer_size,
+            max_insert,
+            len(dictionary.content),
+        )
+        header = bytes([DICTIONARY]) + dictionary.id.to_bytes(4, "big")
+        return header + encode_block(tokens, entropy)
+    # Совпадения ищутся по хеш-цепочкам, а не перебором всех смещений окна.
+    # Окно - это индексы в одном буфере data (bytes или mmap): данные не
+    # копируются
+    finder = HashChainMatchFinder(
+        data, search_buffer_size, lookahead_buffer_size, chain
+    )
+    tokens = parse(data, finder, strategy, lookahead_buffer_size, max_insert)
+    return encode_block(tokens, entropy)
+
+
+def encode_block(tokens, entropy=False):
+    """Записывает токены: полями фиксированной ширины или, с entropy,
+    кодами Хаффмана"""
+    compressed = bytearray()  # Сжатые данные
+    if not tokens:  # Пустой вход
+        return compressed
+
+    if entropy:
+        # Байт 0 на месте числа бит смещения (оно всегда не меньше 1)
+        # отмечает токены, сжатые кодами Хаффмана
+        compressed.append(0)
+        compressed += encode_tokens(tokens, MIN_MATCH)
+        return compressed
 
     # Определяем минимальное количество бит для чисел
     max_offset = max(t[0] for t in tokens)
@@ -84,102 +278,333 @@ def compress(data, search_buffer_size=4096, lookahead_buffer_size=64):
     compressed.append(offset_bits)
     compressed.append(length_bits)
 
-    # Кодируем токены в биты
-    bit_buffer = []
+    # Кодируем токены в биты: offset, length и char (всегда 8 бит)
+    writer = BitWriter()
     for offset, length, char in tokens:
-        # Кодируем offset
-        if offset_bits > 0:
-            bits = bin(offset)[2:].zfill(offset_bits)
-            bit_buffer.extend([int(b) for b in bits])
-
-        # Кодируем length
-        if length_bits > 0:
-            bits = bin(length)[2:].zfill(length_bits)
-            bit_buffer.extend([int(b) for b in bits])
-
-        # Кодируем char (всегда 8 бит)
-        bits = bin(char)[2:].zfill(8)
-        bit_buffer.extend([int(b) for b in bits])
+        writer.write(offset, offset_bits)
+        writer.write(length, length_bits)
+        writer.write(char, 8)
 
     # Упаковываем биты в байты
-    for i in range(0, len(bit_buffer), 8):
-        byte_bits = bit_buffer[i : i + 8]
-        byte_str = "".join(map(str, byte_bits))
-        byte = int(byte_str, 2)
-        compressed.append(byte)
+    compressed += writer.getvalue()
 
     return compressed
 
 
-# Функция распаковки данных
+class LZ77Compressor:
+    """Потоковое сжатие LZ77 с ограниченной памятью.
+
+    Поток: байт STREAM и размер окна (4 байта) - декодеру нужно помнить
+    столько же, затем блоки [длина блока, 4 байта][блок], где блок
+    записан так же, как результат compress (поля своей ширины или коды
+    Хаффмана), но ссылки могут вести в предыдущие блоки. Блок длины 0 -
+    конец потока.
+
+    feed разбирает всё полученное (совпадения не заходят за конец уже
+    полученных данных) и выдаёт блок на каждые block_tokens токенов;
+    flush выдаёт накопленные токены сразу - после него поток выровнен по
+    байту и всё поданное можно восстановить; finish завершает поток.
+    В памяти остаются окно, несжатый хвост и токены одного блока.
+    """
+
+    def __init__(
+        self,
+        search_buffer_size=4096,
+        lookahead_buffer_size=64,
+        level=DEFAULT_LEVEL,
+        max_chain=None,
+        entropy=False,
+        block_tokens=STREAM_BLOCK_TOKENS,
+    ):
+        self.strategy, chain, self.max_insert = LEVELS[level]
+        if max_chain is not None:
+            chain = max_chain
+        self.window = search_buffer_size
+        self.lookahead_buffer_size = lookahead_buffer_size
+        self.entropy = entropy
+        self.block_tokens = block_tokens
+        self.data = bytearray()
+        self.pos = 0  # докуда data уже разобрано
+        self.tokens = []
+        self.started = False
+        self.finder = HashChainMatchFinder(
+            self.data, search_buffer_size, lookahead_buffer_size, chain
+        )
 
+    def _header(self):
+        if self.started:
+            return b""
+        self.started = True
+        return bytes([STREAM]) + self.window.to_bytes(4, "big")
+
+    def _block(self, tokens):
+        block = encode_block(tokens, self.entropy)
+        return len(block).to_bytes(4, "big") + block
+
+    def feed(self, chunk):
+        """Сжимает очередной кусок, возвращает готовые блоки"""
+        out = bytearray(self._header())
+        self.data += chunk
+        self.tokens += parse(
+            self.data,
+            self.finder,
+            self.strategy,
+            self.lookahead_buffer_size,
+            self.max_insert,
+            self.pos,
+        )
+        self.pos = len(self.data)
+        while len(self.tokens) >= self.block_tokens:
+            out += self._block(self.tokens[: self.block_tokens])
+            del self.tokens[: self.block_tokens]
+
+        # Данные дальше окна больше не нужны. Срез кратен размеру окна, чтобы
+        # кольцевой буфер цепочек остался на своих местах
+        cut = (self.pos - self.window) // self.window * self.window
+        if cut >= STREAM_TRIM:
+            del self.data[:cut]
+            self.pos -= cut
+            self.finder.rebase(cut)
+        return bytes(out)
+
+    def flush(self):
+        """Точка синхронизации: выдаёт все накопленные токены блоком"""
+        out = self._header()
+        if self.tokens:
+            out += self._block(self.tokens)
+            self.tokens = []
+        return out
+
+    def finish(self):
+        """Дописывает оставшиеся токены и конец потока"""
+        return self.flush() + bytes(4)
+
+
+class LZ77Decompressor:
+    """Декодер потока LZ77Compressor: feed принимает сжатые данные по
+    частям и возвращает восстановленные байты каждого целого блока"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.window = OutputWindow()
+        self.started = False
+        self.finished = False
+
+    def feed(self, chunk):
+        if self.finished:  # после конца потока данные не читаются
+            return b""
+        buffer = self.buffer
+        buffer += chunk
+        if not self.started:
+            if buffer[:1] and buffer[0] != STREAM:
+                raise ValueError("Это не потоковый формат LZ77")
+            if len(buffer) < 5:  # заголовок ещё не пришёл целиком
+                return b""
+            self.window.keep = int.from_bytes(buffer[1:5], "big")
+            del buffer[:5]
+            self.started = True
+
+        pos = 0
+        while len(buffer) - pos >= 4:
+            size = int.from_bytes(buffer[pos : pos + 4], "big")
+            if size == 0:
+                self.finished = True
+                pos += 4
+                break
+            if len(buffer) - pos - 4 < size:  # блок ещё не пришёл целиком
+                break
+            decode_block(bytes(buffer[pos + 4 : pos + 4 + size]), self.window)
+            pos += 4 + size
+        del buffer[:pos]
+        return self.window.take()
 
-def decompress(compressed_data):
-    if len(compressed_data) < 2:
-        return bytearray()
 
+# Функция распаковки данных
+
+
+def decompress(compressed_data, file=None, dictionary=None):
+    """Восстанавливает данные; с file результат пишется в него по мере
+    декодирования (в памяти остаётся только окно), иначе возвращается.
+    Данные, сжатые со словарём, требуют тот же dictionary"""
+    if compressed_data and compressed_data[0] == DICTIONARY:
+        dictionary_id = int.from_bytes(compressed_data[1:5], "big")
+        if dictionary is None or dictionary.id != dictionary_id:
+            raise ValueError(f"Нужен словарь с id {dictionary_id:08x}")
+        window = OutputWindow(file, dictionary.window, dictionary.content)
+        decode_block(compressed_data[5:], window)
+        if file is None:
+            return bytearray(window.take())
+        window.flush(final=True)
+        return None
+
+    if compressed_data and compressed_data[0] == STREAM:
+        decompressor = LZ77Decompressor()
+        data = decompressor.feed(compressed_data)
+        if file is None:
+            return bytearray(data)
+        file.write(data)
+        return None
+
+    window = OutputWindow(file)
+    decode_block(compressed_data, window)
+    window.flush(final=True)
+    return window.data if file is None else None
+
+
+def decode_block(compressed_data, window):
+    """Декодирует результат compress (или блок потока) в окно window"""
+    if len(compressed_data) >= 2 and compressed_data[0] == 0:
+        # Токены сжаты кодами Хаффмана
+        decode_tokens(BitReader(compressed_data, 8), MIN_MATCH, window)
+    elif len(compressed_data) >= 2:
+        decode_fixed(compressed_data, window)
+
+
+def decode_fixed(compressed_data, window, batch=4096):
+    """Токены полями фиксированной ширины: поле читается из упакованных
+    байт одним числом и разбирается сдвигами"""
     # Читаем заголовок (количество бит для смещения и длины)
     offset_bits = compressed_data[0]
     length_bits = compressed_data[1]
-    data = compressed_data[2:]  # Остальные данные
-
-    # Преобразуем байты в биты
-    bit_buffer = []
-    for byte in data:
-        bits = bin(byte)[2:].zfill(8)
-        bit_buffer.extend([int(b) for b in bits])
+    # Смещение дальше не бывает
+    window.keep = max(window.keep, (1 << offset_bits) - 1)
+    # Остальные данные читаются побитово, начиная с третьего байта
+    reader = BitReader(compressed_data, 16)
+    read = reader.read
+    copy = window.copy
+    out = window.data
 
-    # Читаем токены
-    tokens = []
     token_size = offset_bits + length_bits + 8  # Размер одного токена в битах
-    i = 0
-    while i + token_size <= len(bit_buffer):
-        # Читаем смещение
-        offset_bits_part = bit_buffer[i : i + offset_bits]
-        offset = int("".join(map(str, offset_bits_part)), 2) if offset_bits > 0 else 0
-        i += offset_bits
-
-        # Читаем длину
-        length_bits_part = bit_buffer[i : i + length_bits]
-        length = int("".join(map(str, length_bits_part)), 2) if length_bits > 0 else 0
-        i += length_bits
-
-        # Читаем символ
-        char_bits_part = bit_buffer[i : i + 8]
-        char = int("".join(map(str, char_bits_part)), 2)
-        i += 8
-
-        tokens.append((offset, length, char))
-
-    # Восстанавливаем оригинальные данные
-    decompressed = bytearray()
-    for offset, length, char in tokens:
-        if offset == 0 and length == 0:  # Если совпадений не было
-            decompressed.append(char)
-        else:
-            start = len(decompressed) - offset  # Начало совпадения
-            for j in range(length):  # Копируем совпадающие символы
-                if start + j >= 0 and start + j < len(decompressed):
-                    decompressed.append(decompressed[start + j])
-                else:
-                    decompressed.append(32)  # Запасной вариант (пробел)
-            decompressed.append(char)  # Добавляем следующий символ
-
-    return decompressed
+    # Дополнение до байта короче токена, поэтому число токенов точное
+    count = reader.remaining() // token_size
+    length_mask = (1 << length_bits) - 1
+    while count:
+        for _ in range(min(batch, count)):
+            token = read(token_size)
+            length = (token >> 8) & length_mask
+            if length:  # Копируем совпадение
+                copy(token >> (8 + length_bits), length)
+            out.append(token & 0xFF)  # Добавляем следующий символ
+        count -= min(batch, count)
+        window.flush()
 
 
 # Основная часть программы
 if __name__ == "__main__":
-    text = list(ReadText(sys.argv[2]))  # Читаем входной файл
-    if sys.argv[1] == "decompress":  # Режим распаковки
-        with open(sys.argv[3], "wb") as decompressFile:
-            decompressFile.write(decompress(text))
-    elif sys.argv[1] == "compress":  # Режим сжатия
-        with open(sys.argv[3], "wb") as compressFile:
-            compressFile.write(compress(text))
-        print(
-            "Степень сжатия:",
-            os.path.getsize(sys.argv[2]) / os.path.getsize(sys.argv[3]),
+    parser = argparse.ArgumentParser(
+        usage="python main.py compress/decompress/train input_file output_file"
+    )
+    parser.add_argument("command")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=4096,
+        help="размер буфера поиска (окна) в байтах (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        choices=sorted(LEVELS),
+        default=DEFAULT_LEVEL,
+        help="уровень сжатия: 1-3 - жадный разбор, 4-8 - ленивый, "
+        "9 - оптимальный (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--max-chain",
+        type=int,
+        help="сколько позиций хеш-цепочки проверять для каждого совпадения "
+        "(по умолчанию зависит от уровня)",
+    )
+    parser.add_argument(
+        "--entropy",
+        action="store_true",
+        help="сжать токены кодами Хаффмана (отдельные таблицы для "
+        "литералов/длин и смещений в каждом блоке, как в deflate)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="потоковый формат: блоки выдаются по мере чтения входа, память "
+        "ограничена окном; \"-\" вместо файла - стандартный ввод/вывод",
+    )
+    parser.add_argument(
+        "--dictionary",
+        help="файл заранее заданного словаря (для compress и decompress); "
+        "команда train строит его из входного файла, одна запись на строку",
+    )
+    args = parser.parse_args()
+    if args.window < 1:
+        parser.error("размер окна должен быть положительным")
+
+    if args.dictionary and args.stream:
+        parser.error("словарь не поддерживается потоковым форматом")
+    dictionary = None
+    if args.dictionary and args.command != "train":
+        dictionary = PresetDictionary(ReadText(args.dictionary), args.window)
+
+    if args.command == "train":  # Обучение словаря на записях
+        samples = ReadText(args.input_file).splitlines(keepends=True)
+        with open(args.output_file, "wb") as dictionaryFile:
+            dictionaryFile.write(train_dictionary(samples, args.window))
+    elif args.command == "decompress":  # Режим распаковки
+        input = OpenInput(args.input_file)
+        if input.peek(1)[:1] == bytes([STREAM]):
+            decompressor = LZ77Decompressor()
+            output = OpenOutput(args.output_file)
+            while not decompressor.finished:
+                chunk = input.read1(IO_CHUNK)
+                if not chunk:
+                    break
+                output.write(decompressor.feed(chunk))
+                output.flush()
+            output.close()
+        else:
+            text = input.read()  # Читаем входной файл
+            with OpenOutput(args.output_file) as decompressFile:
+                try:
+                    decompress(text, decompressFile, dictionary)
+                except ValueError as e:
+                    print(f"Ошибка при распаковке: {e}")
+                    exit(1)
+    elif args.command == "compress" and args.stream:
+        compressor = LZ77Compressor(
+            args.window,
+            level=args.level,
+            max_chain=args.max_chain,
+            entropy=args.entropy,
         )
+        input = OpenInput(args.input_file)
+        output = OpenOutput(args.output_file)
+        while True:
+            chunk = input.read1(IO_CHUNK)
+            if not chunk:
+                break
+            output.write(compressor.feed(chunk))
+            # Вход временно иссяк (канал) - сразу выдаём всё поданное
+            if len(chunk) < IO_CHUNK:
+                output.write(compressor.flush())
+                output.flush()
+        output.write(compressor.finish())
+        output.close()
+    elif args.command == "compress":  # Режим сжатия
+        text = MapText(args.input_file)
+        with open(args.output_file, "wb") as compressFile:
+            compressFile.write(
+                compress(
+                    text,
+                    args.window,
+                    level=args.level,
+                    max_chain=args.max_chain,
+                    entropy=args.entropy,
+                    dictionary=dictionary,
+                )
+            )
+        if os.path.getsize(args.output_file):
+            print(
+                "Степень сжатия:",
+                os.path.getsize(args.input_file) / os.path.getsize(args.output_file),
+            )
     else:
         print("Не известная команда")
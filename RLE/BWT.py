@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def rotation_order(data):
+    """Порядок циклических сдвигов data в лексикографическом порядке
+    (суффиксный массив циклической строки) удвоением префикса.
+
+    rank[i] - место в order, с которого начинается группа сдвигов,
+    совпадающих с i в первых k символах. На шаге k группа уточняется
+    сортировкой по rank[i + k]; пара рангов сортируется как одно 64-битное
+    число. Сдвиги из групп размера 1 уже стоят на своих местах и дальше не
+    сортируются (как у Ларссона-Садакане), поэтому шаги быстро становятся
+    дешёвыми. Шагов не больше log2(n). Равные сдвиги (периодичные данные)
+    упорядочиваются по начальной позиции - как стабильная сортировка
+    матрицы сдвигов.
+    """
+    text = np.frombuffer(bytes(data), dtype=np.uint8)
+    n = len(text)
+    order = np.argsort(text, kind="stable").astype(np.int64)
+    rank = group_starts(text[order].astype(np.int64), np.arange(n), order, n)
+    # Места в order, ещё не стоящие окончательно
+    slots = unsorted_slots(rank, order)
+    k = 1
+    while len(slots) and k < n:
+        members = order[slots]
+        key = rank[members] * n + rank[(members + k) % n]
+        sub = np.argsort(key, kind="stable")
+        members = members[sub]
+        order[slots] = members
+        rank = group_starts(key[sub], slots, members, n, rank)
+        slots = unsorted_slots(rank, order, slots)
+        k *= 2
+    return order
+
+
+def group_starts(sorted_key, slots, members, n, rank=None):
+    """Ранги после сортировки: каждому сдвигу из members (стоящих на местах
+    slots в порядке sorted_key) - место начала его группы равных ключей"""
+    if rank is None:
+        rank = np.empty(n, dtype=np.int64)
+    starts = np.ones(len(sorted_key), dtype=bool)
+    starts[1:] = sorted_key[1:] != sorted_key[:-1]
+    first = np.maximum.accumulate(np.where(starts, np.arange(len(starts)), 0))
+    rank[members] = np.asarray(slots)[first]
+    return rank
+
+
+def unsorted_slots(rank, order, slots=None):
+    """Места в order, чья группа содержит больше одного сдвига"""
+    if slots is None:
+        slots = np.arange(len(order))
+    group = rank[order[slots]]
+    shared = np.zeros(len(slots), dtype=bool)
+    same = group[1:] == group[:-1]
+    shared[1:] |= same
+    shared[:-1] |= same
+    return slots[shared]
+
+
+def bwt_forward(data):
+    """Преобразование Барроуза-Уилера: (original_index, последний столбец).
+
+    original_index - номер (с 1) исходной строки среди отсортированных
+    сдвигов, как у сортировки полной матрицы сдвигов, но без неё: память
+    O(n) вместо O(n^2).
+    """
+    n = len(data)
+    if n == 0:
+        return 0, b""
+    order = rotation_order(data)
+    text = np.frombuffer(bytes(data), dtype=np.uint8)
+    # Последний символ сдвига, начинающегося в i, - text[i - 1]
+    last = text[(order - 1) % n]
+    original_index = int(np.flatnonzero(order == 0)[0]) + 1
+    return original_index, last.tobytes()
+
+
+def bwt_inverse(original_index, last):
+    """Обратное преобразование по LF-отображению за O(n).
+
+    Стабильная сортировка последнего столбца даёт первый столбец: символ
+    last[r] - это первый символ строки LF[r], и строка LF[r] - сдвиг на
+    один символ левее строки r. Исходная строка восстанавливается с конца
+    одним проходом от строки original_index.
+    """
+    n = len(last)
+    if n == 0:
+        return b""
+    column = np.frombuffer(bytes(last), dtype=np.uint8)
+    lf = np.empty(n, dtype=np.int64)
+    lf[np.argsort(column, kind="stable")] = np.arange(n)
+
+    rows = lf.tolist()
+    out = bytearray(n)
+    row = original_index - 1
+    for i in range(n - 1, -1, -1):
+        out[i] = last[row]
+        row = rows[row]
+    return bytes(out)
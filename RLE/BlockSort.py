@@ -0,0 +1,145 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BWT import bwt_forward, bwt_inverse
+from Common.BitIO import BitReader, BitWriter
+from Common.PrefixCode import canonicalCodes, decodeTable, packageMerge
+
+# Сжатие блоками в духе bzip2: BWT -> move-to-front -> серии нулей ->
+# код Хаффмана. Блоки независимы, поэтому сжимаются и распаковываются
+# параллельно.
+#
+# Алфавит после MTF: RUNA и RUNB записывают длину серии нулей (MTF-номер 0
+# - повтор предыдущего символа) в биективной двоичной системе, номер
+# v >= 1 - символ v + 1, END_OF_BLOCK завершает блок.
+BLOCK_SIZE = 900_000
+RUNA = 0
+RUNB = 1
+END_OF_BLOCK = 257
+MAX_CODE_LEN = 15
+# Таблица блока: для каждого символа алфавита бит "встречается" и, если
+# да, длина его кода
+CODE_LEN_BITS = 4
+INDEX_BITS = 32  # номер исходной строки BWT
+
+
+def write_zero_run(out, run):
+    """Серия из run нулей цифрами RUNA (1) и RUNB (2), младшая первой"""
+    while run:
+        if run & 1:
+            out.append(RUNA)
+            run = (run - 1) >> 1
+        else:
+            out.append(RUNB)
+            run = (run - 2) >> 1
+
+
+def mtf_encode(last):
+    """Move-to-front последнего столбца BWT вместе с кодированием серий
+    нулей: список символов алфавита блока без END_OF_BLOCK.
+
+    Последний столбец BWT состоит из длинных серий одного байта, поэтому
+    цикл идёт по сериям, а не по байтам: первый байт серии получает свой
+    MTF-номер, остальные - нули.
+    """
+    column = np.frombuffer(bytes(last), dtype=np.uint8)
+    if len(column) == 0:
+        return []
+    starts = np.flatnonzero(np.diff(column)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.append(starts, len(column)))
+
+    order = bytearray(range(256))
+    out = []
+    zeros = 0
+    for byte, length in zip(column[starts].tolist(), lengths.tolist()):
+        if byte == order[0]:
+            zeros += length
+            continue
+        write_zero_run(out, zeros)
+        position = order.index(byte)
+        del order[position]
+        order.insert(0, byte)
+        out.append(position + 1)
+        zeros = length - 1
+    write_zero_run(out, zeros)
+    return out
+
+
+def mtf_decode(symbols):
+    """Обратное к mtf_encode: последний столбец BWT"""
+    order = bytearray(range(256))
+    out = bytearray()
+    run = 0
+    weight = 1  # вес следующей цифры RUNA/RUNB
+    for symbol in symbols:
+        if symbol <= RUNB:
+            run += weight << symbol
+            weight <<= 1
+            continue
+        if run:
+            out += order[:1] * run
+            run = 0
+            weight = 1
+        position = symbol - 1
+        byte = order[position]
+        del order[position]
+        order.insert(0, byte)
+        out.append(byte)
+    out += order[:1] * run
+    return out
+
+
+def compress_block(block):
+    """Блок: [номер исходной строки BWT, 32 бита][таблица длин кодов]
+    [коды символов ... END_OF_BLOCK]"""
+    index, last = bwt_forward(block)
+    symbols = mtf_encode(last)
+    symbols.append(END_OF_BLOCK)
+
+    counts = np.bincount(symbols, minlength=END_OF_BLOCK + 1)
+    frequencies = {int(s): int(counts[s]) for s in np.flatnonzero(counts)}
+    lengths = packageMerge(frequencies, MAX_CODE_LEN)
+    code_table = [0] * (END_OF_BLOCK + 1)
+    length_table = [0] * (END_OF_BLOCK + 1)
+    for symbol, (code, length) in canonicalCodes(lengths).items():
+        code_table[symbol] = code
+        length_table[symbol] = length
+
+    writer = BitWriter()
+    writer.write(index, INDEX_BITS)
+    for symbol in range(END_OF_BLOCK + 1):
+        if symbol in lengths:
+            writer.write(1, 1)
+            writer.write(lengths[symbol] - 1, CODE_LEN_BITS)
+        else:
+            writer.write(0, 1)
+    writer.writeCodes(symbols, code_table, length_table)
+    return writer.getvalue()
+
+
+def decompress_block(payload):
+    """Восстанавливает исходные байты блока из compress_block"""
+    reader = BitReader(payload)
+    index = reader.read(INDEX_BITS)
+    lengths = {}
+    for symbol in range(END_OF_BLOCK + 1):
+        if reader.read(1):
+            lengths[symbol] = reader.read(CODE_LEN_BITS) + 1
+    bits, table, sizes = decodeTable(lengths)
+
+    peek = reader.peek
+    skip = reader.skip
+    symbols = []
+    append = symbols.append
+    while True:
+        code = peek(bits)
+        symbol = table[code]
+        skip(sizes[code])
+        if symbol == END_OF_BLOCK:
+            break
+        append(symbol)
+    return bwt_inverse(index, mtf_decode(symbols))
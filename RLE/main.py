@@ -1,6 +1,13 @@
 #!/bin/python3
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BlockSort import BLOCK_SIZE, compress_block, decompress_block
+from BWT import bwt_forward, bwt_inverse
+from Common.BitIO import BitReader, BitWriter
 
 
 def ReadText(file_name):
@@ -12,7 +19,7 @@ def ReadText(file_name):
         exit(0)
 
 
-def compress(index, bwt):
+def compress(index, bwt, input_file, output_file):
     # print(bwt)
     rle_encoded = []
     count = 1
@@ -22,7 +29,9 @@ def compress(index, bwt):
         else:
             rle_encoded.append((bwt[i - 1], count))
             count = 1
-    if rle_encoded[-1][0] != bwt[-1]:
+    # Последняя серия (или единственная, если все символы одинаковые);
+    # у пустого входа серий нет
+    if bwt and (not rle_encoded or rle_encoded[-1][0] != bwt[-1]):
         rle_encoded.append((bwt[-1], count))
 
     # colvoByteForIndex index  colvoBitForLen
@@ -30,100 +39,144 @@ def compress(index, bwt):
     # print(rle_encoded)
     # print(index)
     try:
-        with open(sys.argv[3], "wb") as file:
+        with open(output_file, "wb") as file:
             colvoByteForIndex = (
                 index.bit_length() + 7
             ) // 8  # print(colvoByteForIndex)
             file.write(colvoByteForIndex.to_bytes(1, "big"))
             file.write(index.to_bytes(colvoByteForIndex, "big"))
-            colvoBitForLen = len(bin(max([x for _, x in rle_encoded]))) - 2
+            colvoBitForLen = len(bin(max([x for _, x in rle_encoded], default=0))) - 2
             # print(colvoBitForLen)
             file.write(colvoBitForLen.to_bytes(1, "big"))
-            data = ""
+            writer = BitWriter()
             for byte, _len in rle_encoded:
-                data += bin(byte)[2:].zfill(8)
-                data += bin(_len)[2:].zfill(colvoBitForLen)
-            if len(data) % 8 != 0:
-                data += "0" * (8 - len(data) % 8)
-            for i in range(0, len(data), 8):
-                file.write(int(data[i: i + 8], 2).to_bytes(1, "big"))
+                writer.write(byte, 8)
+                writer.write(_len, colvoBitForLen)
+            file.write(writer.getvalue())
     except Exception as e:
         print("Что-то не так", e)
     print(
         "Степень сжатия: ", os.path.getsize(
-            sys.argv[2]) / os.path.getsize(sys.argv[3])
+            input_file) / os.path.getsize(output_file)
     )
     # print(rle_encoded)
 
 
-def decompress(text):
-    bwt = []
+def decompress(text, output_file):
+    bwt = bytearray()
     colvoByteForIndex = text[0]
-    index = int.from_bytes(bytearray(text[1: colvoByteForIndex + 1]), "big")
+    index = int.from_bytes(text[1 : colvoByteForIndex + 1], "big")
     print(index)
-    colvoBitForLen = text[colvoByteForIndex + 1: colvoByteForIndex + 2][0]
+    colvoBitForLen = text[colvoByteForIndex + 1]
     print(colvoBitForLen)
-    text = "".join([bin(x)[2:].zfill(8) for x in text[colvoByteForIndex + 2:]])
-    while len(text) > 0:
-        try:
-            symbol = int(text[:8], 2)
-            text = text[8:]
-            _len = int(text[:colvoBitForLen], 2)
-            text = text[colvoBitForLen:]
-            for i in range(_len):
-                bwt.append(symbol)
-        except:
-            break
-    # print(bwt, index)
-
-    matrix = [b""] * len(bwt)
-    for j in range(len(bwt) - 1, -1, -1):
-        for i in range(len(bwt)):
-            matrix[i] = bwt[i].to_bytes(1, "big") + matrix[i]
-        matrix = sorted(matrix)
-    # print(matrix)
-    original = matrix[index - 1]
-    with open(sys.argv[3], "wb") as file:
-        for byte in original:
-            file.write(byte.to_bytes(1, "big"))
-
-
-def generate_cyclic_matrix(text):
-    n = len(text)
-    return [text[i:] + text[:i] for i in range(n)]
+    reader = BitReader(text, (colvoByteForIndex + 2) * 8)
+    # Биты дополнения в конце короче одной пары (символ, длина), поэтому
+    # число пар известно заранее; пара читается одним вызовом
+    width = 8 + colvoBitForLen
+    mask = (1 << colvoBitForLen) - 1
+    read = reader.read
+    for _ in range(reader.remaining() // width):
+        pair = read(width)
+        bwt += bytes((pair >> colvoBitForLen,)) * (pair & mask)
+
+    # Исходная строка - по LF-отображению, без матрицы сдвигов
+    original = bwt_inverse(index, bwt)
+    with open(output_file, "wb") as file:
+        file.write(original)
+
+
+# Первый байт формата блочного сжатия; у одноблочного формата там число
+# байт номера строки BWT, которое не бывает таким большим
+BLOCK_SORT = 0xFF
+BLOCK_LENGTH_BYTES = 4
+
+
+def map_blocks(function, blocks, jobs):
+    """function для каждого блока, по порядку; при jobs > 1 блоки
+    обрабатываются параллельно в пуле процессов"""
+    if jobs <= 1 or len(blocks) <= 1:
+        yield from map(function, blocks)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(function, blocks)
+
+
+def compress_blocks(text, output_file, block_size, jobs):
+    """Блочное сжатие: [BLOCK_SORT], затем для каждого блока
+    [длина сжатого блока, 4 байта][блок из compress_block]"""
+    blocks = [
+        text[start : start + block_size] for start in range(0, len(text), block_size)
+    ]
+    with open(output_file, "wb") as file:
+        file.write(bytes([BLOCK_SORT]))
+        for payload in map_blocks(compress_block, blocks, jobs):
+            file.write(len(payload).to_bytes(BLOCK_LENGTH_BYTES, "big"))
+            file.write(payload)
+
+
+def decompress_blocks(text, output_file, jobs):
+    payloads = []
+    pos = 1
+    while pos < len(text):
+        length = int.from_bytes(text[pos : pos + BLOCK_LENGTH_BYTES], "big")
+        pos += BLOCK_LENGTH_BYTES
+        payloads.append(text[pos : pos + length])
+        pos += length
+    with open(output_file, "wb") as file:
+        for block in map_blocks(decompress_block, payloads, jobs):
+            file.write(block)
 
 
 if __name__ == "__main__":
-    text = list(ReadText(sys.argv[2]))
-    if sys.argv[1] == "decompress":
-        decompress(text)
+    parser = argparse.ArgumentParser(
+        usage="python main.py compress/decompress input_file output_file"
+    )
+    parser.add_argument("command")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument(
+        "--block-sort",
+        action="store_true",
+        help="сжатие блоками как в bzip2: BWT, move-to-front, серии нулей и "
+        "код Хаффмана; распаковка определяет формат сама",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=BLOCK_SIZE,
+        help="размер блока в байтах для --block-sort (по умолчанию %(default)s)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="сколько процессов сжимают и распаковывают блоки (по умолчанию "
+        "- число ядер, %(default)s)",
+    )
+    args = parser.parse_args()
+    if args.block_size < 1:
+        parser.error("размер блока должен быть положительным")
+
+    if args.command == "decompress":
+        text = ReadText(args.input_file)
+        if text[:1] == bytes([BLOCK_SORT]):
+            decompress_blocks(text, args.output_file, args.jobs)
+        else:
+            decompress(text, args.output_file)
         exit(0)
-    elif sys.argv[1] == "compress":
-        matrix = generate_cyclic_matrix(text)
-
-        # Создаем список кортежей (строка, исходный индекс)
-        indexed_matrix = [(row, i) for i, row in enumerate(matrix)]
-
-        # Сортируем лексикографически
-        sorted_matrix = sorted(indexed_matrix, key=lambda x: x[0])
-
-        # Находим индекс исходной строки в отсортированном списке
-        original_index = None
-        for idx, (row, original_pos) in enumerate(sorted_matrix, 1):
-            if original_pos == 0:  # Исходная строка имеет исходный индекс 0
-                original_index = idx
-
-        # Выводим отсортированную матрицу с нумерацией
-        # print("[")
-        # for idx, (row, original_pos) in enumerate(sorted_matrix, 1):
-        #    print(f"{idx:2d} {row}")
-        # print("]")
-
-        # print(
-        #    f"Исходная строка находится на позиции: {
-        #         original_index}"
-        #        )
-
-        compress(original_index, [row[-1] for row, _ in sorted_matrix])
+    elif args.command == "compress" and args.block_sort:
+        compress_blocks(
+            ReadText(args.input_file), args.output_file, args.block_size, args.jobs
+        )
+        if os.path.getsize(args.output_file):
+            print(
+                "Степень сжатия: ",
+                os.path.getsize(args.input_file) / os.path.getsize(args.output_file),
+            )
+    elif args.command == "compress":
+        # Последний столбец отсортированной матрицы сдвигов и номер исходной
+        # строки в ней - по суффиксному массиву, без построения матрицы
+        original_index, bwt = bwt_forward(ReadText(args.input_file))
+        compress(original_index, bwt, args.input_file, args.output_file)
     else:
         print("Не известная команда")
@@ -0,0 +1,156 @@
+import os
+import sys
+from bisect import bisect_left
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.BitIO import BitReader, BitWriter
+from Common.Histogram import countFrequencies
+from Common.PrefixCode import flatTable
+
+# Коды не длиннее этого декодируются плоской таблицей на 2^maxLen элементов
+FLAT_TABLE_BITS = 15
+
+
+class ShannonFanoCodec:
+    """Кодек Шеннона-Фано для буферов в памяти.
+
+    Формат: [число символов % 256][бит на длину кода][бит дополнения],
+    затем для каждого символа (символ 8 бит, длина, код) и сжатые данные.
+
+    Без frequencies модель строится заново по каждому буферу в encode;
+    с frequencies таблица кодов собирается один раз и переиспользуется, а
+    буфер с байтом, которого нет в модели, вызывает ValueError.
+    decode читает таблицу из заголовка и запоминает последнюю собранную
+    таблицу декодирования, поэтому поток буферов с одной моделью не
+    пересобирает её на каждом вызове.
+    """
+
+    def __init__(self, frequencies=None):
+        self.codes = None  # codes[byte] - код байта как число
+        self.lengths = None  # lengths[byte] - длина кода, 0 - нет в модели
+        if frequencies:
+            self.codes, self.lengths = self.buildCodes(frequencies)
+        self._decodeKey = None
+        self._decodeTable = None
+
+    @staticmethod
+    def buildCodes(frequencies):
+        """Таблица кодирования по частотам {байт: количество}.
+
+        Символы сортируются по убыванию частоты, и по префиксным суммам
+        точка разбиения каждого отрезка ищется двоичным поиском, так что
+        построение занимает O(k log k) для k символов.
+        """
+        symbols = sorted(frequencies, key=lambda char: (-frequencies[char], char))
+        prefix = [0]
+        for char in symbols:
+            prefix.append(prefix[-1] + frequencies[char])
+
+        codes = [0] * 256
+        lengths = [0] * 256
+        if len(symbols) == 1:
+            lengths[symbols[0]] = 1
+            return codes, lengths
+
+        # Отрезки symbols[lo:hi] обходятся стеком вместо рекурсии
+        stack = [(0, len(symbols), 0, 0)]
+        while stack:
+            lo, hi, code, length = stack.pop()
+            if hi - lo == 1:
+                codes[symbols[lo]] = code
+                lengths[symbols[lo]] = length
+                continue
+            total = prefix[hi] - prefix[lo]
+            # Первый j, на котором сумма отрезка до j доходит до половины
+            j = bisect_left(prefix, prefix[lo] + (total + 1) // 2, lo + 1, hi)
+            # Выбираем лучшее разделение - ближе к середине
+            left = prefix[j] - prefix[lo]
+            if j - 1 > lo and abs(2 * (prefix[j - 1] - prefix[lo]) - total) < abs(
+                2 * left - total
+            ):
+                j -= 1
+            stack.append((lo, j, code << 1, length + 1))
+            stack.append((j, hi, (code << 1) | 1, length + 1))
+        return codes, lengths
+
+    def encode(self, data):
+        """Сжимает data, результат содержит таблицу кодов и декодируется сам"""
+        if not data:
+            return b""
+        frequencies = countFrequencies(data)
+        if self.codes is None:
+            codes, lengths = self.buildCodes(frequencies)
+        else:
+            codes, lengths = self.codes, self.lengths
+            missing = [char for char in frequencies if not lengths[char]]
+            if missing:
+                raise ValueError(f"байтов {missing} нет в модели кодека")
+        symbols = [char for char in range(256) if lengths[char]]
+        maxLen = max(lengths)  # max_len_code
+        colvoBitForLen = maxLen.bit_length()
+
+        writer = BitWriter()
+        for char in symbols:
+            writer.write(char, 8)  # add symbol
+            writer.write(lengths[char], colvoBitForLen)  # len
+            writer.write(codes[char], lengths[char])
+        writer.writeCodes(data, codes, lengths)
+        pad = writer.align()
+        # 256 символов записывается как 0
+        return bytes([len(symbols) % 256, colvoBitForLen, pad]) + writer.data
+
+    def _readTable(self, data):
+        """Разбирает таблицу кодов из заголовка: (reader, таблица декодирования)"""
+        lenDict = data[0] or 256
+        colvoBitLenCode = data[1]
+        reader = BitReader(memoryview(data), 24)
+        codes = dict()
+        for _ in range(lenDict):
+            key = reader.read(8)
+            lenCode = reader.read(colvoBitLenCode)
+            codes[key] = (reader.read(lenCode), lenCode)
+
+        # Ключ - сама таблица кодов: байт дополнения и первые биты данных
+        # в заголовке свои у каждого буфера
+        if codes != self._decodeKey:
+            self._decodeKey = codes
+            self._decodeTable = self.buildDecodeTable(codes)
+        return reader, self._decodeTable
+
+    @staticmethod
+    def buildDecodeTable(codes):
+        """Плоская таблица (maxLen, символы, длины) для кодов до
+        FLAT_TABLE_BITS бит, иначе словарь (код, длина) -> символ"""
+        maxLen = max(length for _, length in codes.values())
+        if maxLen > FLAT_TABLE_BITS:
+            return {value: key for key, value in codes.items()}
+        # Плоская таблица: по следующим maxLen битам сразу символ и длина
+        return flatTable(codes)
+
+    def decode(self, data):
+        """Восстанавливает буфер, сжатый encode"""
+        if not data:
+            return b""
+        pad = data[2]
+        end = len(data) * 8 - pad  # конец значащих бит
+        reader, table = self._readTable(data)
+        out = bytearray()
+        if isinstance(table, tuple):
+            maxLen, symbols, lengths = table
+            peek = reader.peek
+            skip = reader.skip
+            tell = reader.tell
+            while tell() < end:
+                index = peek(maxLen)
+                out.append(symbols[index])
+                skip(lengths[index])
+        else:
+            # Длинные коды - побитово по словарю (код, длина) -> символ
+            while reader.tell() < end:
+                code = 0
+                length = 0
+                while (code, length) not in table:
+                    code = (code << 1) | reader.read(1)
+                    length += 1
+                out.append(table[(code, length)])
+        return bytes(out)
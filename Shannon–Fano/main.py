@@ -1,7 +1,7 @@
 #!/bin/python3
 import sys
 
-from Node import Node
+from ShannonFanoCodec import ShannonFanoCodec
 
 
 def ReadText(file_name):
@@ -13,88 +13,15 @@ def ReadText(file_name):
         exit(0)
 
 
-def buildShannonFanoTree(frequencyDict):
-    # Сортируем символы по убыванию частоты
-    sorted_symbols = sorted(frequencyDict.items(), key=lambda x: -x[1])
-
-    # Рекурсивно строим дерево
-    def buildTree(symbols):
-        if len(symbols) == 1:
-            return Node(symbols[0][0], symbols[0][1])
-
-        # Находим место для разделения
-        total = sum(freq for _, freq in symbols)
-        half = total / 2
-        sum_freq = 0
-        split_index = 0
-
-        for i, (_, freq) in enumerate(symbols):
-            sum_freq += freq
-            if sum_freq >= half:
-                split_index = i
-                # Выбираем лучшее разделение - ближе к середине
-                if i > 0 and abs(sum_freq - freq - half) < abs(sum_freq - half):
-                    split_index = i - 1
-                break
-
-        # Разделяем на две части
-        left_part = symbols[: split_index + 1]
-        right_part = symbols[split_index + 1 :]
-
-        # Создаем узел
-        node = Node("", total)
-        node.Left = buildTree(left_part)
-        node.Right = buildTree(right_part)
-
-        return node
-
-    return buildTree(sorted_symbols)
-
-
-def getCodes(node):
-    global frequencyDict
-    left = node.Left
-    right = node.Right
-    code_left = node.Value + "0"
-    code_right = node.Value + "1"
-    if left.Value != "":
-        frequencyDict[left.Value] = code_left
-    else:
-        left.Value = code_left
-        getCodes(left)
-    if right.Value != "":
-        frequencyDict[right.Value] = code_right
-    else:
-        right.Value = code_right
-        getCodes(right)
-
-
-def compress(frequencyDict, text):
-    compr = ""
-    for char in text:
-        compr += frequencyDict[char]
-    fr = ""
-    maxLen = len(max(frequencyDict.values(), key=len))  # max_len_code
-    colvoBitForLen = len(bin(maxLen)) - 2
-    for char, value in frequencyDict.items():
-        fr += f"{char:08b}"  # add symbol
-        fr += bin(len(value))[2:].zfill(colvoBitForLen)  # len
-        fr += value
-
-    data = fr + compr
-    if len(data) % 8 != 0:
-        data += "0" * (8 - len(data) % 8)
+def compress(text):
+    data = ShannonFanoCodec().encode(text)
 
     original_size = len(text)
-    # +2 for lenDict and colvoBitForLen bytes
-    compressed_size = len(data) // 8 + 2
+    compressed_size = len(data)
 
     try:
         with open(sys.argv[3], "wb") as file:
-            file.write(len(frequencyDict).to_bytes(1, "big"))
-            file.write(colvoBitForLen.to_bytes(1, "big"))
-            for i in range(0, len(data), 8):
-                file.write(int(data[i : i + 8], 2).to_bytes(1, "big"))
+            file.write(data)
 
         # Выводим статистику сжатия
         print(f"Размер исходного файла: {original_size} байт")
@@ -111,24 +38,10 @@ def compress(frequencyDict, text):
 
 
 def decompress(text):
-    lenDict = text[0]
-    colvoBitLenCode = text[1]
-    text = "".join([bin(x)[2:].zfill(8) for x in text[2:]])
-    dic = dict()
-    for _ in range(lenDict):
-        key = int(text[:8], 2)
-        lenCode = int(text[8 : 8 + colvoBitLenCode], 2)
-        value = text[8 + colvoBitLenCode : 8 + colvoBitLenCode + lenCode]
-        text = text[8 + colvoBitLenCode + lenCode :]
-        dic[value] = key
     try:
+        out = ShannonFanoCodec().decode(text)
         with open(sys.argv[3], "wb") as file:
-            while len(text) > 0:
-                code = ""
-                while code not in dic.keys():
-                    code += text[0]
-                    text = text[1:]
-                file.write(dic[code].to_bytes(1, "big"))
+            file.write(out)
     except Exception as e:
         print(f"Ошибка при распаковке: {e}")
         exit(0)
@@ -145,9 +58,6 @@ if __name__ == "__main__":
     if sys.argv[1] == "decompress":
         decompress(text)
     elif sys.argv[1] == "compress":
-        frequencyDict = {char: text.count(char) for char in set(text)}
-        head = buildShannonFanoTree(frequencyDict)
-        getCodes(head)
-        compress(frequencyDict, text)
+        compress(text)
     else:
         print("Неизвестная команда. Используйте 'compress' или 'decompress'")